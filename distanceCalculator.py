@@ -0,0 +1,150 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+All-pairs maze distances for a layout.
+
+The distances between every pair of non-wall cells are computed once with a
+breadth-first search from each cell and kept in a flat uint16 array indexed
+by cell id, so that a distance query is two dictionary lookups and an array
+index.  Tables are shared by every agent and game that uses the same walls:
+
+> distances = getMazeDistances(gameState.getWalls())
+> distances.distance((1, 1), (5, 3))
+
+Tables are also persisted through tableCache, so later runs and worker
+processes map them from disk instead of running the searches again.
+"""
+
+import weakref
+from array import array
+from game import Directions
+from game import Actions
+from util import nearestPoint
+import tableCache
+
+
+class MazeDistances:
+    """
+    Shortest path lengths between all pairs of non-wall cells of a maze.
+
+    Cells are numbered column by column (x major, y minor); cells[i] is the
+    position of cell i and cellIds maps positions back to ids.  neighbors[i]
+    lists the (action, cell id) pairs reachable from cell i in one move;
+    the same transitions are kept as actions[i], a tuple of the legal
+    actions, and moves[i], a dictionary from action to cell id, for search
+    problems over the cells.
+    """
+    UNREACHABLE = 65535
+
+    def __init__(self, walls, useDiskCache=False):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        self.cellIds = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.numCells = len(self.cells)
+        self.neighbors = []
+        for x, y in self.cells:
+            moves = []
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                nextCell = (x + int(dx), y + int(dy))
+                if nextCell in self.cellIds:
+                    moves.append((action, self.cellIds[nextCell]))
+            self.neighbors.append(moves)
+        self.actions = [tuple([action for action, nextCell in moves]) for moves in self.neighbors]
+        self.moves = [dict(moves) for moves in self.neighbors]
+        if useDiskCache:
+            self.table = tableCache.loadTable('distances', str(walls), 'H', self._computeTable)
+        else:
+            self.table = self._computeTable()
+
+    def _computeTable(self):
+        numCells = self.numCells
+        adjacency = [[cell for _, cell in moves] for moves in self.neighbors]
+        unreachableRow = array('H', [self.UNREACHABLE]) * numCells
+        table = array('H')
+        for source in range(numCells):
+            row = array('H', unreachableRow)
+            row[source] = 0
+            frontier = [source]
+            distance = 0
+            while frontier:
+                distance += 1
+                nextFrontier = []
+                for cell in frontier:
+                    for neighbor in adjacency[cell]:
+                        if row[neighbor] == self.UNREACHABLE:
+                            row[neighbor] = distance
+                            nextFrontier.append(neighbor)
+                frontier = nextFrontier
+            table.extend(row)
+        return table
+
+    def getCellId(self, position):
+        """
+        Returns the id of the cell at position.  Positions between cells
+        (scared ghosts move at half speed) are rounded to the nearest cell.
+        """
+        cellId = self.cellIds.get(position)
+        if cellId is None:
+            cellId = self.cellIds[nearestPoint(position)]
+        return cellId
+
+    def distance(self, position1, position2):
+        """
+        Returns the maze distance between two positions, or UNREACHABLE.
+        """
+        return self.table[self.getCellId(position1) * self.numCells + self.getCellId(position2)]
+
+    def cellDistance(self, cellId1, cellId2):
+        return self.table[cellId1 * self.numCells + cellId2]
+
+
+DISTANCE_CACHE = {}
+# Frozen walls grids (those of Layouts) by id, with a weak reference to the
+# grid so that an entry dies with its grid and ids are never mistaken
+WALLS_CACHE = {}
+
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a walls Grid, computing it on first use.
+    Any two walls grids with the same cells share one table, in memory and
+    on disk: the table only depends on the walls of a layout, so editing the
+    walls of a .lay file invalidates it while moving food or agents does not.
+
+    Frozen walls, such as those of every game state of a game, are looked up
+    by identity, so repeated calls are O(1); the key of the table, the text
+    of the walls, is only built the first time a grid is seen.
+    """
+    frozen = walls.isFrozen()
+    if frozen:
+        entry = WALLS_CACHE.get(id(walls))
+        if entry is not None and entry[0]() is walls:
+            return entry[1]
+    key = str(walls)
+    if key not in DISTANCE_CACHE:
+        DISTANCE_CACHE[key] = MazeDistances(walls, useDiskCache=True)
+    distances = DISTANCE_CACHE[key]
+    if frozen:
+        wallsId = id(walls)
+        WALLS_CACHE[wallsId] = (weakref.ref(walls, lambda ref: _forgetWalls(wallsId, ref)), distances)
+    return distances
+
+
+def _forgetWalls(wallsId, ref):
+    entry = WALLS_CACHE.get(wallsId)
+    if entry is not None and entry[0] is ref:
+        del WALLS_CACHE[wallsId]
@@ -0,0 +1,285 @@
+# engineBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmarks for the hot paths of the game engine.
+
+Every benchmark repeats one operation (generating a successor, copying a
+grid, playing a whole game, ...) in timed samples and reports operations
+per second together with the 50th, 90th and 99th percentile time per
+operation.  Results can be saved as a baseline and later runs compared
+against it; the script exits with status 1 if any benchmark got slower
+than the baseline by more than the threshold:
+
+> python engineBenchmark.py --saveBaseline baseline.json
+> python engineBenchmark.py --baseline baseline.json --threshold 0.2
+> python engineBenchmark.py --filter 'Grid|hash'
+
+Baselines depend on the machine they were measured on, so keep them out of
+version control and compare runs made on the same machine.
+"""
+
+import gc
+import re
+import sys
+import json
+import time
+import random
+import platform
+import itertools
+import layout
+import textDisplay
+from pacman import GameState, ClassicGameRules
+from multiAgents import MultiPacmanAgent
+from ghostAgents import RandomGhost
+
+STATE_LAYOUT = 'mediumClassic'
+GAME_LAYOUTS = ['minimaxClassic', 'trappedClassic', 'smallClassic', 'originalClassic', 'mediumClassic']
+PARSE_LAYOUTS = ['mediumClassic', 'bigClassic']
+GRID_TYPES = ['list', 'bits']
+
+
+class Benchmark:
+    """
+    A named operation to time.  setup() is called once and returns the
+    operation, a function of no arguments.  Benchmarks of slow operations
+    such as whole games set a smaller number of samples.
+    """
+
+    def __init__(self, name, setup, samples=None):
+        self.name = name
+        self.setup = setup
+        self.samples = samples
+
+
+def collectStates(gridType, numStates=300, seed=0):
+    """
+    Returns numStates (state, agentIndex) pairs met on a random walk through
+    the states of STATE_LAYOUT, restarting whenever the game ends.
+    """
+    rng = random.Random(seed)
+    lay = layout.getLayout(STATE_LAYOUT, gridType=gridType)
+    start = GameState()
+    start.initialize(lay, lay.getNumGhosts())
+    states = []
+    state, agentIndex = start, 0
+    while len(states) < numStates:
+        if state.isWin() or state.isLose():
+            state, agentIndex = start, 0
+        states.append((state, agentIndex))
+        state = state.generateSuccessor(agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+        agentIndex = (agentIndex + 1) % state.getNumAgents()
+    return states
+
+
+def setupGenerateSuccessor(gridType):
+    moves = [(state, agentIndex, action) for state, agentIndex in collectStates(gridType)
+             for action in state.getLegalActions(agentIndex)]
+    nextMove = itertools.cycle(moves).__next__
+
+    def generateSuccessor():
+        state, agentIndex, action = nextMove()
+        state.generateSuccessor(agentIndex, action)
+    return generateSuccessor
+
+
+def setupGetLegalActions(gridType):
+    nextState = itertools.cycle(collectStates(gridType)).__next__
+
+    def getLegalActions():
+        state, agentIndex = nextState()
+        state.getLegalActions(agentIndex)
+    return getLegalActions
+
+
+def setupHash(gridType):
+    nextState = itertools.cycle([state for state, agentIndex in collectStates(gridType)]).__next__
+
+    def stateHash():
+        hash(nextState())
+    return stateHash
+
+
+def setupEq(gridType):
+    # Compare equal states that are distinct objects, the expensive case
+    pairs = [(state, state.deepCopy()) for state, agentIndex in collectStates(gridType)]
+    nextPair = itertools.cycle(pairs).__next__
+
+    def stateEq():
+        state, copy = nextPair()
+        state == copy
+    return stateEq
+
+
+def setupGridOperation(gridType, operation):
+    # A food grid from the middle of a game, so that it is partly eaten
+    states = collectStates(gridType)
+    food = states[len(states) // 2][0].getFood()
+    return getattr(food, operation)
+
+
+def setupLayoutParsing(layoutName):
+    layoutText = layout.getLayout(layoutName).layoutText
+
+    def parseLayout():
+        layout.Layout(layoutText)
+    return parseLayout
+
+
+def setupGame(layoutName):
+    lay = layout.getLayout(layoutName)
+
+    def playGame():
+        # The same game every time
+        random.seed('engineBenchmark')
+        rules = ClassicGameRules()
+        ghosts = [RandomGhost(i + 1) for i in range(lay.getNumGhosts())]
+        game = rules.newGame(lay, [MultiPacmanAgent()], ghosts, textDisplay.NullGraphics(), quiet=True)
+        game.run()
+    return playGame
+
+
+def getBenchmarks():
+    benchmarks = []
+    for gridType in GRID_TYPES:
+        benchmarks.append(Benchmark('GameState.generateSuccessor[%s]' % gridType, lambda g=gridType: setupGenerateSuccessor(g)))
+        benchmarks.append(Benchmark('GameState.getLegalActions[%s]' % gridType, lambda g=gridType: setupGetLegalActions(g)))
+        benchmarks.append(Benchmark('GameStateData.__hash__[%s]' % gridType, lambda g=gridType: setupHash(g)))
+        benchmarks.append(Benchmark('GameStateData.__eq__[%s]' % gridType, lambda g=gridType: setupEq(g)))
+    for gridType in GRID_TYPES:
+        gridName = {'list': 'Grid', 'bits': 'BitGrid'}[gridType]
+        for operation in ['copy', 'count', 'asList', 'packBits']:
+            benchmarks.append(Benchmark('%s.%s' % (gridName, operation),
+                                        lambda g=gridType, o=operation: setupGridOperation(g, o)))
+    for layoutName in PARSE_LAYOUTS:
+        benchmarks.append(Benchmark('Layout[%s]' % layoutName, lambda l=layoutName: setupLayoutParsing(l)))
+    for layoutName in GAME_LAYOUTS:
+        benchmarks.append(Benchmark('MultiPacmanAgent game[%s]' % layoutName, lambda l=layoutName: setupGame(l), samples=3))
+    return benchmarks
+
+
+def percentile(values, fraction):
+    """
+    The nearest-rank percentile of a sorted list.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(operation, samples, sampleTime):
+    """
+    Times samples batches of calls to operation, each batch lasting about
+    sampleTime seconds, and returns the operations per second and the
+    percentile seconds per operation, computed from the batches.
+    """
+    # Calibrate the number of calls per batch, which also warms up caches
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sampleTime / 4:
+            break
+        number *= 4
+    number = max(1, int(number * sampleTime / elapsed))
+
+    times = []
+    gcEnabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(samples):
+            start = time.perf_counter()
+            for _ in range(number):
+                operation()
+            times.append((time.perf_counter() - start) / number)
+    finally:
+        if gcEnabled:
+            gc.enable()
+    times.sort()
+    p50 = percentile(times, 0.5)
+    return {'opsPerSec': 1.0 / p50, 'p50': p50, 'p90': percentile(times, 0.9), 'p99': percentile(times, 0.99),
+            'samples': samples, 'number': number}
+
+
+def formatTime(seconds):
+    if seconds >= 1:
+        return '%.2fs' % seconds
+    if seconds >= 1e-3:
+        return '%.2fms' % (seconds * 1e3)
+    return '%.2fus' % (seconds * 1e6)
+
+
+def runBenchmarks(benchmarks, samples, sampleTime, baseline=None, threshold=0.2):
+    """
+    Measures and prints every benchmark, comparing it with the baseline
+    results if any.  Returns the results and the names of the benchmarks
+    that regressed past the threshold.
+    """
+    results = {}
+    regressions = []
+    print('%-36s %14s %10s %10s %10s %9s' % ('benchmark', 'ops/sec', 'p50', 'p90', 'p99', 'baseline'))
+    for benchmark in benchmarks:
+        operation = benchmark.setup()
+        result = measure(operation, benchmark.samples or samples, sampleTime)
+        results[benchmark.name] = result
+        change = ''
+        if baseline is not None and benchmark.name in baseline:
+            ratio = result['opsPerSec'] / baseline[benchmark.name]['opsPerSec']
+            change = '%+.1f%%' % ((ratio - 1) * 100)
+            if ratio < 1 - threshold:
+                regressions.append(benchmark.name)
+                change += ' REGRESSION'
+        print('%-36s %14.1f %10s %10s %10s %9s' % (benchmark.name, result['opsPerSec'], formatTime(result['p50']),
+                                                   formatTime(result['p90']), formatTime(result['p99']), change))
+        sys.stdout.flush()
+    return results, regressions
+
+
+def readCommand(argv):
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Benchmarks the hot paths of the Pacman game engine.')
+    parser.add_argument('--filter', dest='filter', default=None, metavar='REGEX',
+                        help='Only runs the benchmarks whose name matches REGEX')
+    parser.add_argument('--samples', dest='samples', type=int, default=15,
+                        help='Number of timed samples per benchmark (default %(default)s)')
+    parser.add_argument('--sampleTime', dest='sampleTime', type=float, default=0.05,
+                        help='Approximate seconds per sample (default %(default)s)')
+    parser.add_argument('--baseline', dest='baseline', default=None, metavar='FILE',
+                        help='Compares the results with the baseline JSON in FILE')
+    parser.add_argument('--threshold', dest='threshold', type=float, default=0.2,
+                        help='Fraction of the baseline ops/sec a benchmark may lose before it counts as a regression (default %(default)s)')
+    parser.add_argument('--saveBaseline', dest='saveBaseline', default=None, metavar='FILE',
+                        help='Saves the results as a baseline JSON to FILE')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    benchmarks = getBenchmarks()
+    if options.filter is not None:
+        benchmarks = [b for b in benchmarks if re.search(options.filter, b.name)]
+    baseline = None
+    if options.baseline is not None:
+        with open(options.baseline) as f:
+            baseline = json.load(f)['results']
+    results, regressions = runBenchmarks(benchmarks, options.samples, options.sampleTime, baseline, options.threshold)
+    if options.saveBaseline is not None:
+        with open(options.saveBaseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=2)
+            f.write('\n')
+    if regressions:
+        print('Regressed by more than %d%%: %s' % (options.threshold * 100, ', '.join(regressions)))
+        sys.exit(1)
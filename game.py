@@ -17,6 +17,7 @@ import time
 import os
 import traceback
 import sys
+import random
 
 #######################
 # Parts worth reading #
@@ -29,7 +30,14 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+    def setTimeLimits(self, moveWarningTime, maxTotalTime): # learns the time limits
+
+    Agents that never modify the states they are given can set
+    readOnlyStates, which lets Game.runHeadless pass them the game state
+    itself instead of a deep copy.  The flag is not inherited: a subclass
+    only gets the game state if it sets readOnlyStates itself.
     """
+    readOnlyStates = False
 
     def __init__(self, index=0):
         self.index = index
@@ -64,6 +72,14 @@ class Directions:
                STOP: STOP}
 
 
+def isReadOnlyAgent(agent):
+    """
+    Whether the class of agent itself, not one of its bases, promises that
+    the agent never modifies the states it is given (Agent.readOnlyStates).
+    """
+    return type(agent).__dict__.get('readOnlyStates', False)
+
+
 class Configuration:
     """
     A Configuration holds the (x,y) coordinate of a character, along with its
@@ -198,6 +214,11 @@ class Grid:
     def __eq__(self, other):
         if other == None:
             return False
+        if isinstance(other, BitGrid):
+            return other == self
+        if type(self.data) is not type(other.data):
+            # One of the grids is frozen
+            return [list(x) for x in self.data] == [list(x) for x in other.data]
         return self.data == other.data
 
     def __hash__(self):
@@ -212,10 +233,20 @@ class Grid:
         return hash(h)
 
     def copy(self):
-        g = Grid(self.width, self.height, data=[x[:] for x in self.data])
+        g = Grid(self.width, self.height, data=[list(x) for x in self.data])
         # g.data = [x[:] for x in self.data]
         return g
 
+    def freeze(self):
+        """
+        Makes the grid read-only: writes raise a TypeError, while copies of
+        the grid can be changed as usual.
+        """
+        self.data = tuple([tuple(x) for x in self.data])
+
+    def isFrozen(self):
+        return type(self.data) is tuple
+
     def deepCopy(self):
         return self.copy()
 
@@ -286,11 +317,203 @@ class Grid:
         return bools
 
 
-def reconstituteGrid(bitRep):
+class BitGrid:
+    """
+    A drop-in alternative to Grid that stores every cell as one bit of a
+    single Python int.  Cell (x,y) lives at bit x * height + y, which is the
+    same ordering Grid.__hash__ uses, so a BitGrid and a Grid holding the same
+    cells hash alike.
+
+    Data is still accessed via grid[x][y].  count() is a popcount, asList()
+    only visits the set bits, copy() shares the (immutable) int and the hash
+    is the hash of the int itself.
+    """
+    frozen = False
+
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None, bits=None):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        if bits is None:
+            bits = (1 << (width * height)) - 1 if initialValue else 0
+        self.bits = bits
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def fromGrid(grid):
+        """
+        Builds a BitGrid holding the same cells as a list-backed Grid.
+        """
+        bits = 0
+        bit = 1
+        for column in grid.data:
+            for cell in column:
+                if cell:
+                    bits |= bit
+                bit <<= 1
+        return BitGrid(grid.width, grid.height, bits=bits)
+    fromGrid = staticmethod(fromGrid)
+
+    def toGrid(self):
+        """
+        Returns a list-backed Grid holding the same cells.
+        """
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.width
+        if not 0 <= i < self.width:
+            raise IndexError('BitGrid column index out of range')
+        return _BitGridColumn(self, i)
+
+    def __setitem__(self, key, item):
+        column = _BitGridColumn(self, key)
+        for y in range(self.height):
+            column[y] = item[y]
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield _BitGridColumn(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None:
+            return False
+        if isinstance(other, Grid):
+            other = BitGrid.fromGrid(other)
+        return self.width == other.width and self.height == other.height and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        return BitGrid(self.width, self.height, bits=self.bits)
+
+    def freeze(self):
+        """
+        Makes the grid read-only, as Grid.freeze does.
+        """
+        self.frozen = True
+
+    def isFrozen(self):
+        return self.frozen
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        numSet = self.bits.bit_count()
+        if item:
+            return numSet
+        return self.width * self.height - numSet
+
+    def asList(self, key=True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        height = self.height
+        list = []
+        while bits:
+            lowest = bits & -bits
+            list.append(divmod(lowest.bit_length() - 1, height))
+            bits ^= lowest
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) representation as
+        Grid.packBits.
+        """
+        size = self.CELLS_PER_INT
+        numCells = self.width * self.height
+        bits = [self.width, self.height]
+        for start in range(0, numCells - numCells % size + 1, size):
+            chunk = (self.bits >> start) & ((1 << size) - 1)
+            # Grid packs the first cell of each chunk into the highest bit
+            bits.append(int(format(chunk, '0%db' % size)[::-1], 2))
+        return tuple(bits)
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        size = self.CELLS_PER_INT
+        numCells = self.width * self.height
+        value = 0
+        for i, packed in enumerate(bits):
+            if packed < 0:
+                raise ValueError("must be a positive integer")
+            value |= int(format(packed, '0%db' % size)[::-1], 2) << (i * size)
+        self.bits = value & ((1 << numCells) - 1)
+
+
+class _BitGridColumn:
+    """
+    The grid[x] view of a BitGrid, so that grid[x][y] reads and writes work
+    the same way they do on a list-backed Grid.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __getitem__(self, y):
+        height = self.grid.height
+        if y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('BitGrid row index out of range')
+        return (self.grid.bits >> (self.offset + y)) & 1 == 1
+
+    def __setitem__(self, y, item):
+        if self.grid.frozen:
+            raise TypeError('a frozen BitGrid does not support item assignment')
+        height = self.grid.height
+        if y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('BitGrid row index out of range')
+        if item:
+            self.grid.bits |= 1 << (self.offset + y)
+        else:
+            self.grid.bits &= ~(1 << (self.offset + y))
+
+    def __iter__(self):
+        bits = self.grid.bits >> self.offset
+        for y in range(self.grid.height):
+            yield (bits >> y) & 1 == 1
+
+    def __len__(self):
+        return self.grid.height
+
+
+# Grid implementations that can be selected per game (see layout.getLayout)
+GRID_TYPES = {'list': Grid, 'bits': BitGrid}
+
+
+def reconstituteGrid(bitRep, gridType=Grid):
     if type(bitRep) is not type((1, 2)):
         return bitRep
     width, height = bitRep[:2]
-    return Grid(width, height, bitRepresentation=bitRep[2:])
+    return gridType(width, height, bitRepresentation=bitRep[2:])
 
 ####################################
 # Parts you shouldn't have to read #
@@ -386,22 +609,81 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+class ZobristKeys:
+    """
+    Random 64-bit keys for Zobrist hashing of a width x height board.  A
+    state's hash is the XOR of the keys of its food cells, its capsule cells
+    and one key per agent, so a move only has to XOR out the old keys and XOR
+    in the new ones.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # A private generator keeps the keys identical from run to run
+        # without touching the game's global random state
+        rng = random.Random(width * 100003 + height)
+        self.food = [rng.getrandbits(64) for _ in range(width * height)]
+        self.capsules = [rng.getrandbits(64) for _ in range(width * height)]
+
+    def foodKey(self, position):
+        x, y = position
+        return self.food[x * self.height + y]
+
+    def capsuleKey(self, position):
+        x, y = position
+        return self.capsules[x * self.height + y]
+
+    def agentKey(self, index, agentState):
+        # Agent positions can be fractional (scared ghosts move at half
+        # speed), so agents are keyed by hashing their fields instead of by
+        # a table lookup
+        conf = agentState.configuration
+        return hash((index, conf.pos, conf.direction, agentState.scaredTimer)) & 0xFFFFFFFFFFFFFFFF
+
+
+ZOBRIST_KEY_CACHE = {}
+
+
+def getZobristKeys(width, height):
+    if (width, height) not in ZOBRIST_KEY_CACHE:
+        ZOBRIST_KEY_CACHE[(width, height)] = ZobristKeys(width, height)
+    return ZOBRIST_KEY_CACHE[(width, height)]
+
+
 class GameStateData:
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        In copy-on-write mode the agent states, capsules, food and score are
+        shared with the predecessor instead; the rules must then go through
+        getMutableAgentState / getMutableCapsules / getMutableScore before
+        changing any of them.
         """
+        self.copyOnWrite = False
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.copyOnWrite = prevState.copyOnWrite
+            if self.copyOnWrite:
+                self.food = prevState.food
+                self.capsules = prevState.capsules
+                self.agentStates = prevState.agentStates[:]
+                self.score = prevState.score
+                self._sharedAgents = (1 << len(self.agentStates)) - 1
+                self._sharedCapsules = True
+                self._sharedScore = True
+            else:
+                self.food = prevState.food.shallowCopy()
+                self._copySharedState(prevState)
             self.layout = prevState.layout
             self._eaten = prevState._eaten
-            self.score = prevState.score.copy()
             self.numGhosts = prevState.numGhosts
             self.numPacman = prevState.numPacman
+            self._zobristKeys = prevState._zobristKeys
+            self._zobrist = prevState._zobrist
 
+        self._dirtyAgents = 0
         self._foodEaten = None
         self._foodAdded = None
         self._capsuleEaten = None
@@ -412,8 +694,9 @@ class GameStateData:
 
     def deepCopy(self):
         state = GameStateData(self)
+        if state.copyOnWrite:
+            state._copySharedState(self)
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
@@ -426,12 +709,84 @@ class GameStateData:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def _copySharedState(self, prevState):
+        self.capsules = prevState.capsules[:]
+        self.agentStates = self.copyAgentStates(prevState.agentStates)
+        self.score = prevState.score.copy()
+        self._sharedAgents = 0
+        self._sharedCapsules = False
+        self._sharedScore = False
+
+    def getMutableAgentState(self, index):
+        """
+        Returns the AgentState at index, first replacing it with a private
+        copy if it is still shared with the predecessor state.
+        """
+        self._dirtyAgents |= 1 << index
+        if self._sharedAgents >> index & 1:
+            self.agentStates[index] = self.agentStates[index].copy()
+            self._sharedAgents &= ~(1 << index)
+        return self.agentStates[index]
+
+    def getMutableCapsules(self):
+        if self._sharedCapsules:
+            self.capsules = self.capsules[:]
+            self._sharedCapsules = False
+        return self.capsules
+
+    def getMutableScore(self):
+        if self._sharedScore:
+            self.score = self.score.copy()
+            self._sharedScore = False
+        return self.score
+
+    def computeZobristHash(self):
+        """
+        Computes the Zobrist hash of the agents, food and capsules from
+        scratch.  Successors derive theirs incrementally in updateZobristHash.
+        """
+        keys = self._zobristKeys
+        h = 0
+        for index, agentState in enumerate(self.agentStates):
+            h ^= keys.agentKey(index, agentState)
+        for position in self.food.asList():
+            h ^= keys.foodKey(position)
+        for position in self.capsules:
+            h ^= keys.capsuleKey(position)
+        return h
+
+    def updateZobristHash(self, prevState):
+        """
+        Derives this successor's hash from its predecessor's by XORing out and
+        back in the keys of the agents the move touched and of any food or
+        capsule it ate.
+        """
+        keys = self._zobristKeys
+        h = prevState._zobrist
+        dirty = self._dirtyAgents
+        index = 0
+        while dirty:
+            if dirty & 1:
+                h ^= keys.agentKey(index, prevState.agentStates[index])
+                h ^= keys.agentKey(index, self.agentStates[index])
+            dirty >>= 1
+            index += 1
+        if self._foodEaten != None:
+            h ^= keys.foodKey(self._foodEaten)
+        if self._capsuleEaten != None:
+            h ^= keys.capsuleKey(self._capsuleEaten)
+        self._zobrist = h
+        self._dirtyAgents = 0
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
         """
         if other == None:
             return False
+        # States hashed with the same keys but different Zobrist values differ
+        if self._zobristKeys is other._zobristKeys and self._zobrist != other._zobrist:
+            return False
         # TODO Check for type of other
         if not self.agentStates == other.agentStates:
             return False
@@ -446,14 +801,11 @@ class GameStateData:
     def __hash__(self):
         """
         Allows states to be keys of dictionaries.
+
+        The agents, food and capsules are covered by the incrementally
+        maintained Zobrist hash, so this is O(1) in the size of the board.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(tuple(self.score))) % 1048575)
+        return hash((self._zobrist, tuple(self.score)))
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -509,13 +861,20 @@ class GameStateData:
             return '3'
         return 'E'
 
-    def initialize(self, layout, numGhostAgents):
+    def initialize(self, layout, numGhostAgents, copyOnWrite=False):
         """
         Creates an initial game state from a layout array (see layout.py).
+
+        copyOnWrite turns on structural sharing for every successor generated
+        from this state (see __init__).
         """
+        self.copyOnWrite = copyOnWrite
+        self._sharedAgents = 0
+        self._sharedCapsules = False
+        self._sharedScore = False
         self.food = layout.food.copy()
         #self.capsules = []
-        self.capsules = layout.capsules[:]
+        self.capsules = list(layout.capsules)
         self.layout = layout
         
 
@@ -537,6 +896,8 @@ class GameStateData:
         self.scoreChange = [0] * layout.getNumPacman()
         self.numGhosts = numGhosts
         self.numPacman = numPacman
+        self._zobristKeys = getZobristKeys(layout.width, layout.height)
+        self._zobrist = self.computeZobristHash()
 
 
 try:
@@ -566,6 +927,8 @@ class Game:
         self.agentTimeout = False
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
+        # See instrumentation.GameInstrumentation
+        self.instrumentation = None
 
     def getProgress(self):
         if self.gameOver:
@@ -621,6 +984,9 @@ class Game:
                 self.unmute()
                 self._agentCrash(i, quiet=True)
                 return
+            if ("setTimeLimits" in dir(agent)):
+                # let time-budgeted agents stay clear of the timeouts below
+                agent.setTimeLimits(self.rules.getMoveWarningTime(i), self.rules.getMaxTotalTime(i))
             if ("registerInitialState" in dir(agent)):
                 self.mute(i)
                 if self.catchExceptions:
@@ -652,6 +1018,8 @@ class Game:
         while not self.gameOver:
             # Fetch the next agent
             agent = self.agents[agentIndex]
+            if self.instrumentation is not None:
+                self.instrumentation.beforeMove(agentIndex)
             move_time = 0
             skip_action = False
             # Generate an observation of the state
@@ -723,6 +1091,8 @@ class Game:
             else:
                 action = agent.getAction(observation)
             self.unmute()
+            if self.instrumentation is not None:
+                self.instrumentation.afterMove(agentIndex, action)
 
             # Execute the action
             self.moveHistory.append((agentIndex, action))
@@ -767,3 +1137,69 @@ class Game:
                     self.unmute()
                     return
         self.display.finish()
+
+    def runHeadless(self):
+        """
+        A faster control loop for batch simulation with trusted agents.
+
+        Nothing is displayed, agent output is not muted and there are no
+        timeouts.  Agent methods are looked up once per game, and agents
+        with readOnlyStates get the game state itself rather than a deep
+        copy.  With catchExceptions, an agent exception ends the game as a
+        crash of that agent, as in run.
+        """
+        agents = self.agents
+        numAgents = len(agents)
+        for i in range(numAgents):
+            if not agents[i]:
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self._agentCrash(i, quiet=True)
+                return
+
+        copyStates = [not isReadOnlyAgent(agent) for agent in agents]
+        agentIndex = self.startingIndex
+        try:
+            for i, agent in enumerate(agents):
+                agentIndex = i
+                if hasattr(agent, 'setTimeLimits'):
+                    agent.setTimeLimits(self.rules.getMoveWarningTime(i), self.rules.getMaxTotalTime(i))
+                if hasattr(agent, 'registerInitialState'):
+                    start_time = time.time()
+                    agent.registerInitialState(self.state.deepCopy() if copyStates[i] else self.state)
+                    self.totalAgentTimes[i] += time.time() - start_time
+
+            observationFunctions = [getattr(agent, 'observationFunction', None) for agent in agents]
+            getActions = [agent.getAction for agent in agents]
+            totalAgentTimes = self.totalAgentTimes
+            moveHistory = self.moveHistory
+            rules = self.rules
+            agentIndex = self.startingIndex
+            state = self.state
+
+            instrumentation = self.instrumentation
+
+            while not self.gameOver:
+                if instrumentation is not None:
+                    instrumentation.beforeMove(agentIndex)
+                start_time = time.time()
+                observation = state.deepCopy() if copyStates[agentIndex] else state
+                if observationFunctions[agentIndex] is not None:
+                    observation = observationFunctions[agentIndex](observation)
+                action = getActions[agentIndex](observation)
+                totalAgentTimes[agentIndex] += time.time() - start_time
+                if instrumentation is not None:
+                    instrumentation.afterMove(agentIndex, action)
+
+                moveHistory.append((agentIndex, action))
+                state = state.generateSuccessor(agentIndex, action)
+                self.state = state
+                rules.process(state, self)
+                agentIndex = (agentIndex + 1) % numAgents
+
+            for agentIndex, agent in enumerate(agents):
+                if hasattr(agent, 'final'):
+                    agent.final(state)
+        except Exception:
+            if not self.catchExceptions:
+                raise
+            self._agentCrash(agentIndex)
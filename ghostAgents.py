@@ -38,6 +38,7 @@ class GhostAgent(Agent):
 
 class RandomGhost(GhostAgent):
     "A ghost that chooses a legal action uniformly at random."
+    readOnlyStates = True
 
     def getDistribution(self, state):
         dist = util.Counter()
@@ -49,6 +50,7 @@ class RandomGhost(GhostAgent):
 
 class DirectionalGhost(GhostAgent):
     "A ghost that prefers to rush Pacman, or flee when scared."
+    readOnlyStates = True
 
     def __init__(self, index, prob_attack=0.5, prob_scaredFlee=0.5):
         self.index = index
@@ -0,0 +1,173 @@
+# instrumentation.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Per-move measurements of the agents of a game.
+
+A GameInstrumentation attached to a Game records, for every move, which
+agent moved, how long it took, how many successor states it generated and
+how many times it called its evaluation function.  One agent can also be
+profiled with cProfile and tracemalloc.  Each game is written out as one
+JSON line, or as one CSV row per move if the output file ends in .csv:
+
+> python pacman.py -p ExpectimaxPacmanAgent -q -n 5 --instrument moves.jsonl
+> python pacman.py -p ExpectimaxPacmanAgent -q --instrument moves.csv --profileAgent 0
+"""
+
+import os
+import csv
+import json
+import time
+
+# Agent methods whose calls are counted as evaluations, with the number of
+# states each call evaluates
+EVALUATION_FUNCTIONS = {
+    'evaluationFunction': lambda args: 1,
+    'myEvaluationFunction': lambda args: 1,
+    'evaluateBatch': lambda args: len(args[0]),
+}
+
+CSV_FIELDS = ['game', 'move', 'agent', 'action', 'time', 'successors', 'evaluations', 'peakMemory']
+
+
+class GameInstrumentation:
+    """
+    Collects the per-move records of the games it is attached to, and
+    writes them to outputFile (or keeps them, if outputFile is None, for
+    whoever calls write later).  If profileAgent is an agent index, that
+    agent's moves run under cProfile, whose stats are dumped to
+    profileFile, and under tracemalloc, whose peak is recorded per move.
+    """
+
+    def __init__(self, outputFile=None, profileAgent=None, profileFile=None):
+        self.outputFile = outputFile
+        self.profileAgent = profileAgent
+        self.profileFile = profileFile
+        self.profiler = None
+        if profileAgent is not None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        self.record = None
+
+    def forWorker(self):
+        """
+        Returns an instrumentation for a worker process, which keeps its
+        records for the parent process to write and profiles into its own
+        file.
+        """
+        profileFile = None
+        if self.profileFile is not None:
+            profileFile = '%s.%d' % (self.profileFile, os.getpid())
+        return GameInstrumentation(None, self.profileAgent, profileFile)
+
+    def attach(self, game, gameIndex):
+        """
+        Starts recording game, the gameIndex-th game of the batch.
+        """
+        game.instrumentation = self
+        self.gameIndex = gameIndex
+        self.moves = []
+        self.record = None
+        # Successors are counted by the exploration tracker of the state
+        # class, started here unless someone else already tracks states
+        self.stateClass = type(game.state)
+        self.ownsTracker = self.stateClass.exploredTracker is None
+        if self.ownsTracker:
+            self.stateClass.trackExplored(maxStates=0)
+        self.tracker = self.stateClass.exploredTracker
+        self.evaluations = [0 for agent in game.agents]
+        self.wrapped = []
+        for agentIndex, agent in enumerate(game.agents):
+            for name, countStates in EVALUATION_FUNCTIONS.items():
+                if agent and callable(getattr(agent, name, None)):
+                    self._countCalls(agent, agentIndex, name, countStates)
+
+    def _countCalls(self, agent, agentIndex, name, countStates):
+        function = getattr(agent, name)
+        evaluations = self.evaluations
+
+        def countingFunction(*args, **kwargs):
+            evaluations[agentIndex] += countStates(args)
+            return function(*args, **kwargs)
+        hadInstanceAttribute = name in agent.__dict__
+        setattr(agent, name, countingFunction)
+        self.wrapped.append((agent, name, function, hadInstanceAttribute))
+
+    def beforeMove(self, agentIndex):
+        self.moveStart = (time.perf_counter(), self.tracker.totalGenerated, self.evaluations[agentIndex])
+        if agentIndex == self.profileAgent:
+            import tracemalloc
+            tracemalloc.start()
+            self.profiler.enable()
+
+    def afterMove(self, agentIndex, action):
+        peakMemory = None
+        if agentIndex == self.profileAgent:
+            import tracemalloc
+            self.profiler.disable()
+            peakMemory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        startTime, startGenerated, startEvaluations = self.moveStart
+        self.moves.append({'agent': agentIndex, 'action': action,
+                           'time': time.perf_counter() - startTime,
+                           'successors': self.tracker.totalGenerated - startGenerated,
+                           'evaluations': self.evaluations[agentIndex] - startEvaluations,
+                           'peakMemory': peakMemory})
+
+    def endGame(self, game):
+        """
+        Detaches from game and writes out (or keeps) its record.
+        """
+        for agent, name, function, hadInstanceAttribute in self.wrapped:
+            if hadInstanceAttribute:
+                setattr(agent, name, function)
+            else:
+                delattr(agent, name)
+        if self.ownsTracker:
+            self.stateClass.stopTrackingExplored()
+        game.instrumentation = None
+        self.record = self.summarize(game)
+        if self.outputFile is not None:
+            self.write(self.record)
+        if self.profiler is not None and self.profileFile is not None:
+            self.profiler.dump_stats(self.profileFile)
+
+    def summarize(self, game):
+        agents = []
+        for agentIndex, agent in enumerate(game.agents):
+            moves = [move for move in self.moves if move['agent'] == agentIndex]
+            times = [move['time'] for move in moves]
+            agents.append({'index': agentIndex, 'type': type(agent).__name__, 'moves': len(moves),
+                           'time': sum(times), 'maxMoveTime': max(times) if times else 0.0,
+                           'successors': sum([move['successors'] for move in moves]),
+                           'evaluations': sum([move['evaluations'] for move in moves])})
+        score = game.state.getScore()
+        return {'game': self.gameIndex, 'score': score, 'win': game.state.isWin(),
+                'crashed': game.agentCrashed, 'agents': agents, 'moves': self.moves}
+
+    def write(self, record):
+        """
+        Appends the record of one game to the output file.
+        """
+        if self.outputFile.endswith('.csv'):
+            writeHeader = not os.path.exists(self.outputFile) or os.path.getsize(self.outputFile) == 0
+            with open(self.outputFile, 'a', newline='') as f:
+                writer = csv.DictWriter(f, CSV_FIELDS)
+                if writeHeader:
+                    writer.writeheader()
+                for moveNumber, move in enumerate(record['moves']):
+                    writer.writerow(dict(move, game=record['game'], move=moveNumber))
+        else:
+            with open(self.outputFile, 'a') as f:
+                f.write(json.dumps(record) + '\n')
@@ -14,6 +14,7 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import GRID_TYPES
 import os
 import random
 from functools import reduce
@@ -24,13 +25,18 @@ VISIBILITY_MATRIX_CACHE = {}
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    Layouts are frozen once built: every game state of a game shares one
+    Layout, so its walls, food, capsules and agent positions cannot be
+    changed.  Copy the walls or food grid before modifying it.
     """
 
-    def __init__(self, layoutText):
+    def __init__(self, layoutText, gridType=Grid):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.gridType = gridType
+        self.walls = gridType(self.width, self.height, False)
+        self.food = gridType(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
@@ -39,6 +45,16 @@ class Layout:
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
         # self.initializeVisibilityMatrix()
+        self.walls.freeze()
+        self.food.freeze()
+        self.capsules = tuple(self.capsules)
+        self.agentPositions = tuple(self.agentPositions)
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError('Layouts are shared by all game states and cannot be changed')
+        object.__setattr__(self, name, value)
 
     def getNumGhosts(self):
         return self.numGhosts
@@ -62,10 +78,9 @@ class Layout:
                             while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)]:
                                 vis[x][y][direction].add((nextx, nexty))
                                 nextx, nexty = x + dx, y + dy
-            self.visibility = vis
             VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+        # The visibility matrix is a cache, so it may be set on a frozen layout
+        object.__setattr__(self, 'visibility', VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)])
 
     def isWall(self, pos):
         x, col = pos
@@ -96,7 +111,8 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Layouts are frozen, so a copy can share everything
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -137,28 +153,34 @@ class Layout:
             self.numGhosts += 1
 
 
-def getLayout(name, back=2):
+def getLayout(name, back=2, gridType='list'):
+    """
+    Loads a layout by name.  gridType picks the Grid implementation backing
+    the walls and food: 'list' (game.Grid) or 'bits' (game.BitGrid).
+    """
+    if gridType in GRID_TYPES:
+        gridType = GRID_TYPES[gridType]
     if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
+        layout = tryToLoad('layouts/' + name, gridType)
         if layout == None:
-            layout = tryToLoad(name)
+            layout = tryToLoad(name, gridType)
     else:
-        layout = tryToLoad('layouts/' + name + '.lay')
+        layout = tryToLoad('layouts/' + name + '.lay', gridType)
         if layout == None:
-            layout = tryToLoad(name + '.lay')
+            layout = tryToLoad(name + '.lay', gridType)
     if layout == None and back >= 0:
         curdir = os.path.abspath('.')
         os.chdir('..')
-        layout = getLayout(name, back - 1)
+        layout = getLayout(name, back - 1, gridType)
         os.chdir(curdir)
     return layout
 
 
-def tryToLoad(fullname):
+def tryToLoad(fullname, gridType=Grid):
     if(not os.path.exists(fullname)):
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return Layout([line.strip() for line in f], gridType)
     finally:
         f.close()
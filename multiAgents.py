@@ -15,8 +15,11 @@
 from util import manhattanDistance
 from game import Directions
 import random, util
+import collections
+import time
 
 from game import Agent
+import distanceCalculator
 
 class ReflexAgent(Agent):
     """
@@ -28,7 +31,6 @@ class ReflexAgent(Agent):
     headers.
     """
 
-
     def getAction(self, gameState):
         """
         You do not need to change this method, but you're welcome to.
@@ -76,6 +78,127 @@ def scoreEvaluationFunction(currentGameState, index):
     """
     return currentGameState.getScore()[index]
 
+class TranspositionTable:
+    """
+    A bounded cache of search values keyed on (state, agent index, remaining
+    depth).  States are keyed by their Zobrist hash and score (see
+    GameStateData.__hash__), which tell different states apart unless their
+    64-bit hashes collide, so entries hold no reference to the states.
+
+    policy is either
+      'depth': a fixed array of maxEntries slots addressed by the key hash;
+               a colliding entry only replaces the resident one if it was
+               searched at least as deep
+      'lru':   a dictionary of at most maxEntries entries that evicts the
+               least recently used one when full
+
+    Entries hold (value, flag, move, depthLimited): flag says whether value
+    is EXACT or only a LOWER/UPPER bound, move is the best action found, if
+    any, and depthLimited whether the search below the entry was cut off by
+    the depth limit rather than reaching only terminal states.
+
+    maxEntries limits the number of entries.  An entry is a few small tuples
+    of ints, floats and shared strings, about ENTRY_BYTES bytes, so the
+    table takes at most about maxEntries * ENTRY_BYTES bytes (plus 8 bytes
+    per slot of the 'depth' array, allocated up front).
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2
+    # Measured with tracemalloc on alpha-beta searches of mediumClassic
+    # (about 260 bytes per entry with the depth policy, 320 with lru)
+    ENTRY_BYTES = 320
+
+    def __init__(self, maxEntries=100000, policy='depth'):
+        if policy not in ('depth', 'lru'):
+            raise Exception('Unknown transposition table policy: %s' % policy)
+        self.maxEntries = int(maxEntries)
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        if self.policy == 'lru':
+            self.entries = collections.OrderedDict()
+        else:
+            self.slots = [None] * self.maxEntries
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def stateKey(state):
+        """
+        The compact key of a GameState: its Zobrist hash and its score.
+        """
+        return (state.data._zobrist, tuple(state.data.score))
+
+    def lookup(self, state, agentIndex, depth):
+        """
+        Returns the (value, flag, move, depthLimited) stored for the key, or
+        None.
+        """
+        key = (self.stateKey(state), agentIndex, depth)
+        if self.policy == 'lru':
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        else:
+            slot = self.slots[hash(key) % self.maxEntries]
+            if slot is not None and slot[0] == key:
+                self.hits += 1
+                return slot[1]
+        self.misses += 1
+        return None
+
+    def store(self, state, agentIndex, depth, value, flag=EXACT, move=None, depthLimited=True):
+        entry = (value, flag, move, depthLimited)
+        key = (self.stateKey(state), agentIndex, depth)
+        self.stores += 1
+        if self.policy == 'lru':
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            elif len(self.entries) >= self.maxEntries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.entries[key] = entry
+            self.size = len(self.entries)
+        else:
+            index = hash(key) % self.maxEntries
+            resident = self.slots[index]
+            if resident is None:
+                self.size += 1
+            elif resident[0][2] > depth:
+                return
+            elif resident[0] != key:
+                self.evictions += 1
+            self.slots[index] = (key, entry)
+
+    def peek(self, state, agentIndex, depth):
+        """
+        Like lookup, but without touching the statistics or the LRU order.
+        """
+        key = (self.stateKey(state), agentIndex, depth)
+        if self.policy == 'lru':
+            return self.entries.get(key)
+        slot = self.slots[hash(key) % self.maxEntries]
+        if slot is not None and slot[0] == key:
+            return slot[1]
+        return None
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def __str__(self):
+        return '%d/%d entries (%s), %d lookups, hit rate %.2f, %d stores, %d evictions' % (
+            self.size, self.maxEntries, self.policy, self.hits + self.misses,
+            self.hitRate(), self.stores, self.evictions)
+
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -91,10 +214,33 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, index = 0, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, index = 0, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', ttPolicy = 'depth',
+                 stats = '0'):
         self.index = index # Pacman is always agent index 0
-        self.evaluationFunction = lambda state:util.lookup(evalFn, globals())(state, self.index)
+        # A module-level function rather than a closure, so that agents can be
+        # pickled into --workers processes
+        self.evalFn = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        # Optional transposition table, e.g. -a ttSize=200000,ttPolicy=lru
+        self.transpositionTable = None
+        if int(ttSize) > 0:
+            self.transpositionTable = TranspositionTable(int(ttSize), ttPolicy)
+        # Search statistics printed after every game, e.g. -a stats=1
+        self.printStats = bool(int(stats))
+        # Time limits of the game rules, if the Game reports them
+        self.moveTimeLimit = None
+        self.totalTimeLimit = None
+
+    def evaluationFunction(self, state):
+        return self.evalFn(state, self.index)
+
+    def setTimeLimits(self, moveWarningTime, maxTotalTime):
+        self.moveTimeLimit = moveWarningTime
+        self.totalTimeLimit = maxTotalTime
+
+    def final(self, state):
+        if self.printStats and self.transpositionTable is not None:
+            print('[%s] transposition table: %s' % (type(self).__name__, self.transpositionTable))
 
 
 
@@ -102,6 +248,8 @@ class MultiPacmanAgent(MultiAgentSearchAgent):
     """
     You implementation here
     """
+    readOnlyStates = True
+
     def myEvaluationFunction(self, currentGameState):
         # Useful information you can extract from a GameState (pacman.py)
         
@@ -160,6 +308,17 @@ class MultiPacmanAgent(MultiAgentSearchAgent):
     def minimax(self, gameState,idx, depth):     
         if depth >= self.depth  or gameState.isWin() or gameState.isLose():
             return self.myEvaluationFunction(gameState)
+        table = self.transpositionTable
+        if table is not None:
+            entry = table.lookup(gameState, idx, self.depth - depth)
+            if entry is not None:
+                return entry[0]
+            value = self._minimax(gameState, idx, depth)
+            table.store(gameState, idx, self.depth - depth, value)
+            return value
+        return self._minimax(gameState, idx, depth)
+
+    def _minimax(self, gameState, idx, depth):
         if idx == 0:  # pacman
             maxval = float('-inf')  
             actions = gameState.getLegalActions(idx) 
@@ -201,7 +360,453 @@ class MultiPacmanAgent(MultiAgentSearchAgent):
                 ret_action = action
         return ret_action  
         
+class SearchTimeout(Exception):
+    """Raised inside a search when the move's time budget has run out"""
+    pass
+
+
+class AlphaBetaPacmanAgent(MultiPacmanAgent):
+    """
+    Minimax with alpha-beta pruning, using the same evaluation function as
+    MultiPacmanAgent.
+
+    Every Pacman (index < numPacman) is a max layer and every ghost a min
+    layer, so layouts such as mediumClassic2pacman search one max layer per
+    Pacman.  self.depth is counted as MultiPacmanAgent.minimax counts it
+    (see searchPlies), so that both agents look equally far ahead and make
+    the same decisions on single-Pacman layouts.
+
+    Children are ordered by the transposition table move (when ttSize is
+    given), then the killer moves of the ply, then the history heuristic, so
+    that most cutoffs happen on the first child searched.  Root moves keep
+    their legal order so ties are broken exactly as plain minimax breaks
+    them.
+
+    With anytime=1 the agent instead deepens iteratively, one depth at a
+    time, until its per-move budget runs out, and plays the best move of the
+    deepest iteration it completed.  The budget is timeFraction of the move
+    warning time the Game reports through setTimeLimits, capped by moveTime
+    when that is given (e.g. -a anytime=1,moveTime=0.5), and never more than
+    TOTAL_TIME_SHARE of what is left of the game's total time allowance.
+    Each iteration searches the previous iteration's principal variation
+    first.
+    """
+    readOnlyStates = True
+    NUM_KILLERS = 2
+    DEFAULT_MOVE_TIME = 1.0
+    TOTAL_TIME_SHARE = 0.02
+
+    def __init__(self, index = 0, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', ttPolicy = 'depth',
+                 anytime = '0', moveTime = '0', timeFraction = '0.8', maxDepth = '50', stats = '0'):
+        MultiPacmanAgent.__init__(self, index, evalFn, depth, ttSize, ttPolicy, stats)
+        self.killers = {}
+        self.history = {}
+        self.nodesExpanded = 0
+        self.totalNodesExpanded = 0
+        self.anytime = bool(int(anytime))
+        self.moveTime = float(moveTime)
+        self.timeFraction = float(timeFraction)
+        self.maxDepth = int(maxDepth)
+        self.principalVariation = []
+        self.completedDepth = 0
+        self.deadline = None
+        self._rootBest = None
+        self._depthLimited = False
+        self._pv = ()
+        self.timeSpent = 0.0
+        if self.anytime and self.transpositionTable is None:
+            # the principal variation is read back from the table
+            self.transpositionTable = TranspositionTable()
+
+    def getAction(self, gameState):
+        self.nodesExpanded = 0
+        self.killers = {}
+        # Age the history scores so old cutoffs fade out move by move
+        self.history = dict((key, score // 2) for key, score in self.history.items() if score > 1)
+
+        if self.anytime:
+            startTime = time.time()
+            action = self.iterativeDeepening(gameState)
+            self.timeSpent += time.time() - startTime
+        else:
+            self.deadline = None
+            action = self.searchRoot(gameState, self.depth)
+        self.totalNodesExpanded += self.nodesExpanded
+        return action
+
+    def setTimeLimits(self, moveWarningTime, maxTotalTime):
+        # called at the start of every game
+        MultiPacmanAgent.setTimeLimits(self, moveWarningTime, maxTotalTime)
+        self.timeSpent = 0.0
+
+    def getMoveBudget(self):
+        """
+        Seconds this agent may spend on one move.
+        """
+        if self.moveTimeLimit is None:
+            budget = self.moveTime or self.DEFAULT_MOVE_TIME
+        else:
+            budget = self.moveTimeLimit * self.timeFraction
+            if self.moveTime > 0:
+                budget = min(budget, self.moveTime)
+        if self.totalTimeLimit is not None:
+            budget = min(budget, (self.totalTimeLimit - self.timeSpent) * self.TOTAL_TIME_SHARE)
+        return budget
+
+    def iterativeDeepening(self, gameState):
+        self.deadline = time.time() + self.getMoveBudget()
+        self.principalVariation = []
+        self.completedDepth = 0
+        self._rootBest = None
+        bestAction = None
+        for depth in range(1, self.maxDepth + 1):
+            self._depthLimited = False
+            try:
+                action = self.searchRoot(gameState, depth, self.principalVariation)
+            except SearchTimeout:
+                break
+            bestAction = action
+            self.completedDepth = depth
+            self.principalVariation = self.extractPrincipalVariation(gameState, depth, action)
+            if not self._depthLimited or time.time() >= self.deadline:
+                # the whole game tree fit, or deepening further cannot finish
+                break
+        if bestAction is None:
+            # not even one round finished: play the best root move seen so far
+            bestAction = self._rootBest or gameState.getLegalActions(self.index)[0]
+        return bestAction
+
+    def extractPrincipalVariation(self, gameState, depth, rootAction):
+        """
+        Follows the best moves stored in the transposition table from the root.
+        """
+        numAgents = gameState.getNumAgents()
+        plies = self.searchPlies(depth, numAgents)
+        pv = [rootAction]
+        state = gameState.generateSuccessor(self.index, rootAction)
+        idx = (self.index + 1) % numAgents
+        plies -= 1
+        while plies > 0 and not (state.isWin() or state.isLose()):
+            entry = self.transpositionTable.peek(state, idx, plies)
+            if entry is None or entry[2] is None:
+                break
+            pv.append(entry[2])
+            state = state.generateSuccessor(idx, entry[2])
+            idx = (idx + 1) % numAgents
+            plies -= 1
+        return pv
+
+    def searchPlies(self, depth, numAgents):
+        """
+        The number of single-agent moves MultiPacmanAgent.minimax searches
+        below the root at the given depth.  Its depth counter goes up on every
+        move from one ghost to the next (but not from the last ghost back to
+        Pacman), so with numGhosts ghosts a round raises it numGhosts - 1
+        times and the search stops on reaching depth, before the remaining
+        ghosts of the final round move.
+
+        With a single ghost that counter never goes up, so full rounds of
+        numAgents moves are searched instead.
+        """
+        numGhosts = numAgents - 1
+        if depth <= 0:
+            # only the root moves are made before evaluating
+            return 1
+        if numGhosts < 2:
+            return depth * numAgents
+        rounds, offset = divmod(depth - 1, numGhosts - 1)
+        return rounds * numAgents + offset + 2
+
+    def searchRoot(self, gameState, depth, pv=()):
+        """
+        Searches as deep as minimax does at depth (see searchPlies) and
+        returns the best action for this agent.
+        Root moves keep their legal order, except that the moves of the
+        principal variation pv are searched first all the way down the tree.
+        """
+        numAgents = gameState.getNumAgents()
+        plies = self.searchPlies(depth, numAgents)
+        nextIdx = (self.index + 1) % numAgents
+        actions = gameState.getLegalActions(self.index)
+        self._pv = pv
+        if pv and pv[0] in actions:
+            actions.remove(pv[0])
+            actions.insert(0, pv[0])
+        alpha = float('-inf')
+        bestValue, bestAction = float('-inf'), None
+        for action in actions:
+            pvPly = 1 if pv and action == pv[0] else None
+            value = self.alphabeta(gameState.generateSuccessor(self.index, action), nextIdx, plies - 1,
+                                   alpha, float('inf'), pvPly)
+            if bestAction is None or value > bestValue:
+                bestValue, bestAction = value, action
+            # remembered in case the next root move runs out of time
+            self._rootBest = bestAction
+            alpha = max(alpha, bestValue)
+        return bestAction
+
+    def alphabeta(self, gameState, idx, plies, alpha, beta, pvPly=None):
+        """
+        Returns the minimax value of gameState with idx to move and plies
+        single-agent moves left, or a bound on it outside (alpha, beta).
+
+        pvPly is set while gameState lies on the principal variation of the
+        previous iteration, and indexes the move to try first.
+        """
+        if self.deadline is not None and time.time() > self.deadline:
+            raise SearchTimeout()
+        if gameState.isWin() or gameState.isLose():
+            return self.myEvaluationFunction(gameState)
+        if plies <= 0:
+            self._depthLimited = True
+            return self.myEvaluationFunction(gameState)
+        actions = gameState.getLegalActions(idx)
+        if not actions:
+            return self.myEvaluationFunction(gameState)
+        self.nodesExpanded += 1
+
+        table = self.transpositionTable
+        tableMove = None
+        if table is not None:
+            entry = table.lookup(gameState, idx, plies)
+            if entry is not None:
+                value, flag, tableMove, depthLimited = entry
+                # a value taken from the table stands for its whole subtree,
+                # including any depth cutoffs made while searching it
+                self._depthLimited = self._depthLimited or depthLimited
+                if flag == TranspositionTable.EXACT:
+                    return value
+                if flag == TranspositionTable.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+        alphaOrig, betaOrig = alpha, beta
+
+        maximizing = idx < gameState.getNumPacman()
+        nextIdx = (idx + 1) % gameState.getNumAgents()
+        best = float('-inf') if maximizing else float('inf')
+        bestMove = None
+        pvMove = None
+        if pvPly is not None and pvPly < len(self._pv):
+            pvMove = self._pv[pvPly]
+        outerLimited, self._depthLimited = self._depthLimited, False
+        for action in self.orderActions(actions, idx, plies, tableMove, pvMove):
+            childPvPly = pvPly + 1 if pvMove is not None and action == pvMove else None
+            value = self.alphabeta(gameState.generateSuccessor(idx, action), nextIdx, plies - 1, alpha, beta,
+                                   childPvPly)
+            if maximizing:
+                if value > best:
+                    best, bestMove = value, action
+                alpha = max(alpha, best)
+            else:
+                if value < best:
+                    best, bestMove = value, action
+                beta = min(beta, best)
+            if alpha >= beta:
+                self.recordCutoff(idx, plies, action)
+                break
+        depthLimited = self._depthLimited
+        self._depthLimited = outerLimited or depthLimited
+
+        if table is not None:
+            if best <= alphaOrig:
+                flag = TranspositionTable.UPPER
+            elif best >= betaOrig:
+                flag = TranspositionTable.LOWER
+            else:
+                flag = TranspositionTable.EXACT
+            table.store(gameState, idx, plies, best, flag, bestMove, depthLimited)
+        return best
+
+    def orderActions(self, actions, idx, plies, tableMove=None, pvMove=None):
+        """
+        Returns actions sorted by history score, with the killer moves of
+        this ply, the transposition table move and then the principal
+        variation move pulled to the front.
+        """
+        history = self.history
+        ordered = sorted(actions, key=lambda action: history.get((idx, action), 0), reverse=True)
+        for move in reversed(self.killers.get(plies, ())):
+            if move in ordered:
+                ordered.remove(move)
+                ordered.insert(0, move)
+        for move in (tableMove, pvMove):
+            if move in ordered:
+                ordered.remove(move)
+                ordered.insert(0, move)
+        return ordered
+
+    def recordCutoff(self, idx, plies, action):
+        killers = self.killers.setdefault(plies, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[self.NUM_KILLERS:]
+        self.history[(idx, action)] = self.history.get((idx, action), 0) + plies * plies
+
+    def final(self, state):
+        if self.printStats:
+            print('[%s] nodes expanded: %d' % (type(self).__name__, self.totalNodesExpanded))
+        MultiPacmanAgent.final(self, state)
+
+
+class ExpectimaxPacmanAgent(MultiAgentSearchAgent):
+    """
+    Expectimax search against stochastic ghosts.
+
+    Pacman layers maximize; each ghost layer is a chance node whose weights
+    come straight from getDistribution of a model of that ghost.  The models
+    are the game's own ghost agents, which the rules hand over through
+    registerGhostAgents.  Naming a ghostAgents class with ghost (e.g. -a
+    ghost=DirectionalGhost) models every ghost as that class instead, with a
+    warning for each ghost of the game that is not one.  Without either,
+    ghosts are modelled as RandomGhosts.
+    self.depth counts full rounds in which each agent moves once.
+
+    When the children of a chance node are leaves they are evaluated in one
+    evaluateBatch call: siblings that differ only in one ghost's move share
+    Pacman's position and the food, so those terms are computed once per
+    chance node and only the ghost terms once per child.
+
+    Distances in the evaluation are true maze distances from the layout's
+    shared distanceCalculator table.  Naming an evaluation function with
+    evalFn (e.g. -a evalFn=scoreEvaluationFunction) replaces that built-in
+    evaluation, and leaves are then evaluated one call at a time.
+    """
+    readOnlyStates = True
+
+    def __init__(self, index = 0, evalFn = None, depth = '2', ttSize = '0', ttPolicy = 'depth',
+                 ghost = None, stats = '0'):
+        MultiAgentSearchAgent.__init__(self, index, evalFn or 'scoreEvaluationFunction', depth, ttSize, ttPolicy,
+                                       stats)
+        # Without an evalFn leaves are scored by the batched evaluation below
+        self.batchEvaluation = evalFn is None
+        self.ghostType = None
+        if ghost is not None:
+            import ghostAgents
+            self.ghostType = getattr(ghostAgents, ghost)
+        self.ghostModels = {}
+        self.nodesExpanded = 0
+        self.distances = None
+
+    def registerInitialState(self, gameState):
+        self.distances = distanceCalculator.getMazeDistances(gameState.getWalls())
+
+    def registerGhostAgents(self, ghostAgents):
+        """
+        Models the ghosts of the coming game by the ghost agents playing it,
+        unless a ghost type was named.
+        """
+        self.ghostModels = {}
+        for ghostAgent in ghostAgents:
+            if self.ghostType is not None:
+                if type(ghostAgent) is not self.ghostType:
+                    print('Warning: modelling ghost %d, a %s, as a %s' % (
+                        ghostAgent.index, type(ghostAgent).__name__, self.ghostType.__name__))
+            elif callable(getattr(ghostAgent, 'getDistribution', None)):
+                self.ghostModels[ghostAgent.index] = ghostAgent
+            else:
+                print('Warning: ghost %d, a %s, has no getDistribution; modelling it as a RandomGhost' % (
+                    ghostAgent.index, type(ghostAgent).__name__))
+
+    def getGhostModel(self, ghostIndex):
+        if ghostIndex not in self.ghostModels:
+            import ghostAgents
+            self.ghostModels[ghostIndex] = (self.ghostType or ghostAgents.RandomGhost)(ghostIndex)
+        return self.ghostModels[ghostIndex]
+
+    def getAction(self, gameState):
+        if self.distances is None:
+            self.registerInitialState(gameState)
+        numAgents = gameState.getNumAgents()
+        plies = self.depth * numAgents
+        nextIdx = (self.index + 1) % numAgents
+        bestValue, bestAction = float('-inf'), None
+        for action in gameState.getLegalActions(self.index):
+            value = self.expectimax(gameState.generateSuccessor(self.index, action), nextIdx, plies - 1)
+            if bestAction is None or value > bestValue:
+                bestValue, bestAction = value, action
+        return bestAction
+
+    def expectimax(self, gameState, idx, plies):
+        if plies <= 0 or gameState.isWin() or gameState.isLose():
+            return self.evaluateBatch([gameState])[0]
+        table = self.transpositionTable
+        if table is not None:
+            entry = table.lookup(gameState, idx, plies)
+            if entry is not None:
+                return entry[0]
+        self.nodesExpanded += 1
+
+        nextIdx = (idx + 1) % gameState.getNumAgents()
+        if idx < gameState.getNumPacman():
+            actions = gameState.getLegalActions(idx)
+            if not actions:
+                return self.evaluateBatch([gameState])[0]
+            value = max([self.expectimax(gameState.generateSuccessor(idx, action), nextIdx, plies - 1)
+                         for action in actions])
+        else:
+            distribution = self.getGhostModel(idx).getDistribution(gameState)
+            actions = [action for action in distribution if distribution[action] > 0]
+            if not actions:
+                return self.evaluateBatch([gameState])[0]
+            weights = [distribution[action] for action in actions]
+            children = [gameState.generateSuccessor(idx, action) for action in actions]
+            if plies == 1:
+                values = self.evaluateBatch(children)
+            else:
+                values = [self.expectimax(child, nextIdx, plies - 1) for child in children]
+            value = sum([w * v for w, v in zip(weights, values)]) / sum(weights)
+
+        if table is not None:
+            table.store(gameState, idx, plies, value)
+        return value
+
+    def evaluateBatch(self, gameStates):
+        """
+        Evaluates states that are all successors of one state by a single
+        ghost's moves (or a single state).  Pacman's position, the food and
+        the capsules are therefore the same for every non-terminal state, so
+        the Pacman terms are computed once for the whole batch.
+        """
+        if not self.batchEvaluation:
+            return [self.evaluationFunction(state) for state in gameStates]
+        values = []
+        pacmanTerms = None
+        for state in gameStates:
+            score = state.getScore()[self.index]
+            if state.isWin() or state.isLose():
+                values.append(score)
+                continue
+            position = state.getPacmanPosition(self.index)
+            if pacmanTerms is None:
+                pacmanTerms = self.pacmanTerms(state, position)
+            values.append(score + pacmanTerms + self.ghostTerms(position, state.getGhostStates()))
+        return values
+
+    def pacmanTerms(self, gameState, position):
+        foodList = gameState.getFood().asList()
+        if not foodList:
+            return 0.0
+        distance = self.distances.distance
+        nearestFood = min([distance(position, food) for food in foodList])
+        return 10.0 / (nearestFood + 1) - 20.0 * len(gameState.getCapsules())
+
+    def ghostTerms(self, position, ghostStates):
+        value = 0.0
+        for ghostState in ghostStates:
+            distance = self.distances.distance(position, ghostState.getPosition())
+            if ghostState.scaredTimer > distance:
+                value += 50.0 / (distance + 1)
+            elif distance <= 2:
+                value -= 100.0 / (distance + 1)
+        return value
+
+
 class RandomAgent(MultiAgentSearchAgent):
+    readOnlyStates = True
+
     def getAction(self, gameState):
         legalMoves = gameState.getLegalActions(self.index)
         return random.choice(legalMoves)
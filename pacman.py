@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -52,6 +53,7 @@ import types
 import time
 import random
 import os
+import hashlib
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -77,15 +79,29 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of the states touched by generateSuccessor;
+    # None (the default) turns the bookkeeping off entirely
+    exploredTracker = None
 
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
+        if GameState.exploredTracker is None:
+            return set()
+        return GameState.exploredTracker.getAndReset()
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def trackExplored(maxStates=100000, sampleEvery=1):
+        """
+        Turns on exploration tracking (see ExploredTracker) and returns the
+        tracker.  maxStates=0 only counts generated successors.
+        """
+        GameState.exploredTracker = ExploredTracker(maxStates, sampleEvery)
+        return GameState.exploredTracker
+    trackExplored = staticmethod(trackExplored)
+
+    def stopTrackingExplored():
+        GameState.exploredTracker = None
+    stopTrackingExplored = staticmethod(stopTrackingExplored)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -121,21 +137,25 @@ class GameState:
         if agentIndex < state.data.numPacman:
             state.data.scoreChange[agentIndex] += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(state.data.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
 
         # Book keeping
         state.data._agentMoved = agentIndex
-        for i in range(state.data.numPacman):
-            state.data.score[i] += state.data.scoreChange[i]
+        scoreChange = state.data.scoreChange
+        if any(scoreChange):
+            score = state.data.getMutableScore()
+            for i in range(state.data.numPacman):
+                score[i] += scoreChange[i]
+        state.data.updateZobristHash(self.data)
         # state.data.score[agentIndex] += state.data.scoreChange[agentIndex]
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploredTracker is not None:
+            GameState.exploredTracker.record(self, state)
         return state
 
-    def getLegalPacmanActions(self, agentIndex):
+    def getLegalPacmanActions(self, agentIndex=0):
         if agentIndex >= self.data.numPacman:
             raise Exception("Invalid index passed to getGhostState")
         return self.getLegalActions(agentIndex)
@@ -148,7 +168,7 @@ class GameState:
             raise Exception("Invalid index passed to getGhostState")
         return self.generateSuccessor(agentIndex, action)
 
-    def getPacmanState(self, agentIndex):
+    def getPacmanState(self, agentIndex=0):
         """
         Returns an AgentState object for pacman (in game.py)
 
@@ -159,7 +179,7 @@ class GameState:
             raise Exception("Invalid index passed to getGhostState")
         return self.data.agentStates[agentIndex].copy()
 
-    def getPacmanPosition(self, agentIndex):
+    def getPacmanPosition(self, agentIndex=0):
         if agentIndex >= self.data.numPacman:
             raise Exception("Invalid index passed to getGhostState")
         return self.data.agentStates[agentIndex].getPosition()
@@ -275,11 +295,48 @@ class GameState:
 
         return str(self.data)
 
-    def initialize(self, layout, numGhostAgents=1000):
+    def initialize(self, layout, numGhostAgents=1000, copyOnWrite=False):
         """
         Creates an initial game state from a layout array (see layout.py).
+
+        With copyOnWrite, successors share every agent state, the capsules and
+        the score with their parent and only copy what the move changes.
         """
-        self.data.initialize(layout, numGhostAgents)
+        self.data.initialize(layout, numGhostAgents, copyOnWrite)
+
+class ExploredTracker:
+    """
+    Opt-in instrumentation for GameState.generateSuccessor.
+
+    Every generated successor is counted.  Every sampleEvery-th parent/child
+    pair is also added to a set of states, which stops growing once it holds
+    maxStates states, so long batches of games can keep tracking on without
+    unbounded memory use.  With maxStates=0 no state is ever hashed.
+    """
+
+    def __init__(self, maxStates=100000, sampleEvery=1):
+        self.maxStates = maxStates
+        self.sampleEvery = max(1, int(sampleEvery))
+        # Unlike numGenerated, never reset by getAndReset
+        self.totalGenerated = 0
+        self.reset()
+
+    def reset(self):
+        self.states = set()
+        self.numGenerated = 0
+
+    def record(self, parent, child):
+        self.numGenerated += 1
+        self.totalGenerated += 1
+        if self.numGenerated % self.sampleEvery == 0 and len(self.states) < self.maxStates:
+            self.states.add(parent)
+            self.states.add(child)
+
+    def getAndReset(self):
+        states = self.states
+        self.reset()
+        return states
+
 
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
@@ -299,13 +356,18 @@ class ClassicGameRules:
     and how the game starts and ends.
     """
 
-    def __init__(self, timeout=30):
+    def __init__(self, timeout=30, copyOnWrite=False):
         self.timeout = timeout
+        self.copyOnWrite = copyOnWrite
 
     def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
         agents = pacmanAgent + ghostAgents[:layout.getNumGhosts()]
+        # Agents that model the ghosts get to see the ghosts they play against
+        for agent in pacmanAgent:
+            if hasattr(agent, 'registerGhostAgents'):
+                agent.registerGhostAgents(ghostAgents[:layout.getNumGhosts()])
         initState = GameState()
-        initState.initialize(layout, len(ghostAgents))
+        initState.initialize(layout, len(ghostAgents), self.copyOnWrite)
         game = Game(agents, display, self, catchExceptions=catchExceptions)
         game.state = initState
         self.initialState = initState.deepCopy()
@@ -378,7 +440,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[pacmanIndex]
+        pacmanState = state.data.getMutableAgentState(pacmanIndex)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -408,11 +470,11 @@ class PacmanRules:
         # Eat capsule
         if(position in state.getCapsules()):
             state.data.scoreChange[pacmanIndex] += 10 * state.getNumFood()
-            state.data.capsules.remove(position)
+            state.data.getMutableCapsules().remove(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getMutableAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -443,7 +505,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost " + str(ghostIndex) + " action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -454,7 +516,9 @@ class GhostRules:
     def decrementTimer(ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint(ghostState.configuration.pos)
+            # Configurations may be shared between states, so replace it
+            ghostState.configuration = Configuration(nearestPoint(ghostState.configuration.pos),
+                                                     ghostState.configuration.direction)
         ghostState.scaredTimer = max(0, timer - 1)
     decrementTimer = staticmethod(decrementTimer)
 
@@ -478,9 +542,11 @@ class GhostRules:
     def collide(state, ghostState, agentIndex, pacmanIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange[pacmanIndex] += 200
+            ghostState = state.data.getMutableAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
-            # Added for first-person
+            # Added for first-person; _eaten may be shared with the parent state
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -555,6 +621,13 @@ def readCommand(argv):
                       help=default('Zoom the size of the graphics window'), default=1.0)
     parser.add_argument('-f', '--fixRandomSeed', action='store_true', dest='fixRandomSeed',
                       help='Fixes the random seed to always play the same game', default=False)
+    parser.add_argument('--seed', dest='seed',
+                      help='Seeds every game of the batch separately from this BASE seed, so that any game can be replayed alone',
+                      metavar='BASE', default=None)
+    parser.add_argument('--gameIndex', dest='gameIndex', type=int,
+                      help='Plays only game INDEX (counting from 0) of the batch seeded with --seed', metavar='INDEX', default=None)
+    parser.add_argument('--manifest', dest='manifest',
+                      help='Writes the seed, layout, agents and result of every game to FILE (JSON)', metavar='FILE', default=None)
     parser.add_argument('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_argument('--replay', dest='gameToReplay',
@@ -569,6 +642,20 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_argument('--timeout', dest='timeout', type=int,
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_argument('--grid', dest='gridType', choices=['list', 'bits'],
+                      help=default('Grid implementation for walls and food: list of lists or int bitboard'), default='list')
+    parser.add_argument('--copyOnWrite', action='store_true', dest='copyOnWrite',
+                      help='Share unchanged agent states, capsules and scores between a state and its successors', default=False)
+    parser.add_argument('--headless', action='store_true', dest='headless',
+                      help='Plays games in a fast loop without display, output muting, timeouts or state copies for read-only agents', default=False)
+    parser.add_argument('--instrument', dest='instrument',
+                      help='Writes per-move times, successor and evaluation counts to FILE: JSON lines, or CSV if FILE ends in .csv',
+                      metavar='FILE', default=None)
+    parser.add_argument('--profileAgent', dest='profileAgent', type=int,
+                      help='Profiles the moves of agent INDEX with cProfile (into the --instrument FILE.prof) and tracemalloc',
+                      metavar='INDEX', default=None)
+    parser.add_argument('--workers', dest='workers', type=int,
+                      help=default('Number of processes to play games in; games in worker processes are never displayed'), default=1)
 
     options = parser.parse_args(argv)
     # if len(otherjunk) != 0:
@@ -580,7 +667,7 @@ def readCommand(argv):
         random.seed('cs188')
 
     # Choose a layout
-    args['layout'] = layout.getLayout(options.layout)
+    args['layout'] = layout.getLayout(options.layout, gridType=options.gridType)
     if args['layout'] == None:
         raise Exception("The layout " + options.layout + " cannot be found")
 
@@ -622,6 +709,25 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['copyOnWrite'] = options.copyOnWrite
+    args['workers'] = options.workers
+    args['headless'] = options.headless
+    if options.gameIndex is not None:
+        if options.seed is None:
+            raise Exception('--gameIndex needs the --seed of the batch the game belongs to')
+        args['gameIndex'] = options.gameIndex
+    if options.seed is not None or options.manifest is not None:
+        args['seed'] = options.seed if options.seed is not None else str(random.getrandbits(64))
+    if options.instrument is not None:
+        import instrumentation
+        open(options.instrument, 'w').close()
+        profileFile = options.instrument + '.prof' if options.profileAgent is not None else None
+        args['instrumentation'] = instrumentation.GameInstrumentation(options.instrument, options.profileAgent, profileFile)
+    elif options.profileAgent is not None:
+        raise Exception('--profileAgent needs an --instrument FILE')
+    if options.manifest is not None:
+        args['manifest'] = SeedManifest(options.manifest, args['seed'], options.layout, options.pacman,
+                                        options.ghost, options.numGhosts, options.agentArgs)
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -684,38 +790,195 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def deriveGameSeed(baseSeed, index):
+    """
+    Returns the random seed of game index of a batch seeded with baseSeed.
+    Every game gets its own seed, so a game plays the same whatever process
+    it runs in and whichever games were played before it.
+    """
+    digest = hashlib.sha256(('%s:%d' % (baseSeed, index)).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class SeedManifest:
+    """
+    Records the seed, layout, agents and outcome of every game of a batch,
+    so that any one game can be replayed with --seed and --gameIndex.
+    """
+
+    def __init__(self, fileName, seed, layoutName, pacman, ghost, numGhosts, agentArgs):
+        self.fileName = fileName
+        self.seed = seed
+        self.batch = {'layout': layoutName, 'pacman': pacman, 'ghost': ghost, 'numGhosts': numGhosts,
+                      'agentArgs': agentArgs}
+        self.games = []
+
+    def addGame(self, index, game):
+        score = game.state.getScore()
+        self.games.append({'index': index, 'seed': deriveGameSeed(self.seed, index),
+                           'score': list(score) if isinstance(score, list) else score,
+                           'win': game.state.isWin(), 'moves': len(game.moveHistory)})
+
+    def write(self):
+        import json
+        manifest = dict(self.batch, seed=self.seed, games=sorted(self.games, key=lambda entry: entry['index']))
+        with open(self.fileName, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+
+
+class GameResult:
+    """
+    The outcome of a game played in a worker process.  It stands in for the
+    Game object, which holds agents and displays that do not travel between
+    processes, and has the attributes runGames reads from a Game.
+    """
+
+    def __init__(self, index, game, instrumentRecord=None):
+        self.index = index
+        self.state = game.state
+        self.gameOver = game.gameOver
+        self.agentCrashed = game.agentCrashed
+        self.totalAgentTimes = game.totalAgentTimes
+        self.moveHistory = game.moveHistory
+        self.instrumentRecord = instrumentRecord
+
+
+# The game components of a worker process, set by _initGameWorker
+_workerGame = None
+
+
+def _initGameWorker(workerGame):
+    global _workerGame
+    import __main__
+    import textDisplay
+    _workerGame = workerGame
+    if workerGame['instrumentation'] is not None:
+        workerGame['instrumentation'] = workerGame['instrumentation'].forWorker()
+    __main__.__dict__['_display'] = textDisplay.NullGraphics()
+
+
+def _playGameInWorker(index):
+    import textDisplay
+    w = _workerGame
+    random.seed(deriveGameSeed(w['seed'], index))
+    rules = ClassicGameRules(w['timeout'], w['copyOnWrite'])
+    game = rules.newGame(w['layout'], w['pacman'], w['ghosts'], textDisplay.NullGraphics(), True, w['catchExceptions'])
+    instrumentation = w['instrumentation']
+    if instrumentation is not None:
+        instrumentation.attach(game, index)
+    if w['headless']:
+        game.runHeadless()
+    else:
+        game.run()
+    if instrumentation is not None:
+        instrumentation.endGame(game)
+        return GameResult(index, game, instrumentation.record)
+    return GameResult(index, game)
+
+
+def recordGame(layout, game, index):
+    import pickle
+    fname = ('recorded-game-%d' % (index + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = open(fname, 'wb')
+    components = {'layout': layout, 'actions': game.moveHistory}
+    pickle.dump(components, f)
+    f.close()
+
+
+def runGamesInWorkers(layout, pacman, ghosts, gameIndices, record, numTraining, catchExceptions, timeout,
+                      copyOnWrite, workers, seed, manifest=None, headless=False, instrumentation=None):
+    """
+    Plays the games of runGames in a pool of worker processes, seeding
+    game i with deriveGameSeed(seed, i), and returns the GameResults of
+    the games that are not training games, in game order.  Results are
+    reported as they arrive.
+    """
+    import multiprocessing
+    workerGame = {'layout': layout, 'pacman': pacman, 'ghosts': ghosts, 'catchExceptions': catchExceptions,
+                  'timeout': timeout, 'copyOnWrite': copyOnWrite, 'seed': seed, 'headless': headless,
+                  'instrumentation': instrumentation}
+    rules = ClassicGameRules(timeout, copyOnWrite)
+    results = []
+    pool = multiprocessing.Pool(min(workers, len(gameIndices)), _initGameWorker, (workerGame,))
+    try:
+        for result in pool.imap_unordered(_playGameInWorker, gameIndices):
+            if result.index >= numTraining:
+                rules.quiet = False
+                rules.process(result.state, result)
+                results.append(result)
+            if record:
+                recordGame(layout, result, result.index)
+            if manifest is not None:
+                manifest.addGame(result.index, result)
+            if instrumentation is not None:
+                instrumentation.write(result.instrumentRecord)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30,
+             copyOnWrite=False, workers=1, seed=None, gameIndex=None, manifest=None, headless=False,
+             instrumentation=None):
+    """
+    Plays numGames games, the first numTraining of them quietly, and prints
+    a summary.  When a seed is given, game i is seeded with
+    deriveGameSeed(seed, i), and only game gameIndex is played if that is
+    given too.  Games are spread over worker processes if workers > 1,
+    and played with Game.runHeadless, never displayed, if headless is set.
+    Every game is recorded by instrumentation (see instrumentation.py) if
+    one is given.
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
-    rules = ClassicGameRules(timeout)
+    rules = ClassicGameRules(timeout, copyOnWrite)
     games = []
+    gameIndices = list(range(numGames)) if gameIndex is None else [gameIndex]
 
-    for i in range(numGames):
-        beQuiet = i < numTraining
-        if beQuiet:
-                # Suppress output and graphics
-            import textDisplay
-            gameDisplay = textDisplay.NullGraphics()
-            rules.quiet = True
-        else:
-            gameDisplay = display
-            rules.quiet = False
-        game = rules.newGame(layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
-        game.run()
-        if not beQuiet:
-            games.append(game)
-
-        if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = open(fname, 'wb')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
-
-    if (numGames-numTraining) > 0:
+    if workers > 1 and len(gameIndices) > 1:
+        if seed is None:
+            seed = random.getrandbits(64)
+        games = runGamesInWorkers(layout, pacman, ghosts, gameIndices, record, numTraining, catchExceptions,
+                                  timeout, copyOnWrite, workers, seed, manifest, headless, instrumentation)
+    else:
+        for i in gameIndices:
+            if seed is not None:
+                random.seed(deriveGameSeed(seed, i))
+            beQuiet = i < numTraining
+            if beQuiet:
+                    # Suppress output and graphics
+                import textDisplay
+                gameDisplay = textDisplay.NullGraphics()
+                rules.quiet = True
+            else:
+                gameDisplay = display
+                rules.quiet = False
+            game = rules.newGame(layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
+            if instrumentation is not None:
+                instrumentation.attach(game, i)
+            if headless:
+                game.runHeadless()
+            else:
+                game.run()
+            if instrumentation is not None:
+                instrumentation.endGame(game)
+            if not beQuiet:
+                games.append(game)
+
+            if record:
+                recordGame(layout, game, i)
+            if manifest is not None:
+                manifest.addGame(i, game)
+
+    if manifest is not None:
+        manifest.write()
+
+    if len(games) > 0:
         scores = [game.state.getScore() for game in games]
         wins = [game.state.isWin() for game in games]
         winRate = wins.count(True) / float(len(wins))
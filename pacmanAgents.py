@@ -21,6 +21,7 @@ import util
 
 class LeftTurnAgent(game.Agent):
     "An agent that turns left at every opportunity"
+    readOnlyStates = True
 
     def getAction(self, state):
         legal = state.getLegalPacmanActions(self.index)
@@ -40,11 +41,16 @@ class LeftTurnAgent(game.Agent):
 
 
 class GreedyAgent(Agent):
+    readOnlyStates = True
+
     def __init__(self, index=0, evalFn="scoreEvaluation"):
-        self.evaluationFunction = lambda state: util.lookup(evalFn, globals())(state, self.index)
-        assert self.evaluationFunction != None
+        self.evalFn = util.lookup(evalFn, globals())
+        assert self.evalFn != None
         self.index = index
 
+    def evaluationFunction(self, state):
+        return self.evalFn(state, self.index)
+
     def getAction(self, state):
         # Generate candidate actions
         legal = state.getLegalPacmanActions(self.index)
@@ -121,14 +121,48 @@ def tinyMazeSearch(problem):
     w = Directions.WEST
     return  [s, s, w, s, w, w, s, w]
 
+def actionsTo(parents, state):
+    """
+    Follows the parent pointers of a search, a map from each state reached
+    to (parent state, action), back from state to the start (which maps to
+    None) and returns the actions leading to state.
+    """
+    actions = []
+    link = parents[state]
+    while link is not None:
+        state, action = link
+        actions.append(action)
+        link = parents[state]
+    actions.reverse()
+    return actions
+
+
 def breadthFirstSearch(problem):
     """
     Search the shallowest nodes in the search tree first.
 
-    You are not required to implement this, but you may find it useful for Q5.
+    Graph search: every state is queued at most once.  States are goal
+    tested as they are generated, which finds the same shallowest goal with
+    fewer expansions.  Returns None if no goal can be reached.
     """
-    "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    start = problem.getStartState()
+    if problem.goalTest(start):
+        return []
+    # Doubles as the closed set
+    parents = {start: None}
+    frontier = util.Queue()
+    frontier.push(start)
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        for action in problem.getActions(state):
+            child = problem.getResult(state, action)
+            if child in parents:
+                continue
+            parents[child] = (state, action)
+            if problem.goalTest(child):
+                return actionsTo(parents, child)
+            frontier.push(child)
+    return None
 
 def nullHeuristic(state, problem=None):
     """
@@ -157,17 +191,285 @@ def iterativeDeepeningSearch(problem: SearchProblem):
     or the resulting cost for one of these actions
     by calling problem.getCost(problem.getStartState(), one_of_the_actions)
 
+    Each iteration is an iterative (explicit stack) depth-limited search
+    that keeps the shallowest depth at which it has reached every state and
+    only revisits a state from a shallower depth.  The search stops, and
+    returns None, once an iteration finds no goal without having been cut
+    off by its depth limit.
     """
-    "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
-    
+    limit = 1
+    while True:
+        actions, cutoff = depthLimitedSearch(problem, limit)
+        if actions is not None:
+            return actions
+        if not cutoff:
+            return None
+        limit += 1
+
+
+def depthLimitedSearch(problem, limit):
+    """
+    Returns a list of at most limit actions reaching a goal, or None, and
+    whether any state was left unexpanded because of the limit.
+    """
+    start = problem.getStartState()
+    if problem.goalTest(start):
+        return [], False
+    depths = {start: 0}
+    path = []  # The actions to the state of the top frame of the stack
+    stack = [(start, iter(problem.getActions(start)))]
+    cutoff = False
+    while stack:
+        state, actions = stack[-1]
+        action = next(actions, None)
+        if action is None:
+            stack.pop()
+            if path:
+                path.pop()
+            continue
+        child = problem.getResult(state, action)
+        depth = len(stack)
+        if depths.get(child, limit + 1) <= depth:
+            continue
+        depths[child] = depth
+        path.append(action)
+        if problem.goalTest(child):
+            return path, cutoff
+        if depth == limit:
+            cutoff = True
+            path.pop()
+            continue
+        stack.append((child, iter(problem.getActions(child))))
+    return None, cutoff
+
 
 def aStarSearch(problem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
-    "*** YOUR CODE HERE ***"
-    util.raiseNotDefined()
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    Graph search over a lazy-deletion heap: a state reached again by a
+    cheaper path is simply pushed again and its older entry skipped.  Ties
+    in f = g + h go to the deeper state (lower h).  A state that is
+    reached more cheaply after it was expanded, which only an inconsistent
+    heuristic allows, is expanded again.  Returns None if no goal can be
+    reached.
+    """
+    start = problem.getStartState()
+    parents = {start: None}
+    # The cheapest known cost of every state reached; a state is only
+    # pushed again when a cheaper path to it is found
+    costs = {start: 0}
+    frontier = util.LazyPriorityQueue()
+    h = heuristic(start, problem)
+    frontier.push(start, (h, h))
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        if problem.goalTest(state):
+            return actionsTo(parents, state)
+        cost = costs[state]
+        for action in problem.getActions(state):
+            child = problem.getResult(state, action)
+            childCost = cost + problem.getCost(state, action)
+            if childCost >= costs.get(child, float('inf')):
+                continue
+            costs[child] = childCost
+            parents[child] = (state, action)
+            h = heuristic(child, problem)
+            frontier.push(child, (childCost + h, h))
+    return None
+
+def bidirectionalSearch(problem):
+    """
+    Breadth first search from the start and from the goal at once, for
+    problems with a single goal state problem.goal, unit costs and
+    reversible actions, such as PositionSearchProblem.
+
+    The searches take turns expanding a whole layer of whichever frontier
+    is smaller.  The first layer that reaches a state the other search has
+    reached closes the shortest path, through the meeting state with the
+    smallest total depth in that layer.  On open layouts the two searches
+    together cover about half the states one breadth first search does.
+    Returns None if the goal cannot be reached.
+    """
+    from game import Actions
+    start, goal = problem.getStartState(), problem.goal
+    if problem.goalTest(start):
+        return []
+    # Forward parents map a state to (parent, action from the parent);
+    # backward ones map a state to (next state, action to the next state)
+    forward = ({start: None}, {start: 0}, [start])
+    backward = ({goal: None}, {goal: 0}, [goal])
+    while forward[2] and backward[2]:
+        isForward = len(forward[2]) <= len(backward[2])
+        (parents, depths, frontier), (otherParents, otherDepths, otherFrontier) = \
+            (forward, backward) if isForward else (backward, forward)
+        meeting, meetingDepth = None, None
+        nextFrontier = []
+        for state in frontier:
+            depth = depths[state] + 1
+            for action in problem.getActions(state):
+                child = problem.getResult(state, action)
+                if child in parents:
+                    continue
+                parents[child] = (state, action if isForward else Actions.reverseDirection(action))
+                depths[child] = depth
+                nextFrontier.append(child)
+                if child in otherDepths and (meeting is None or depth + otherDepths[child] < meetingDepth):
+                    meeting, meetingDepth = child, depth + otherDepths[child]
+        frontier[:] = nextFrontier
+        if meeting is not None:
+            actions = actionsTo(forward[0], meeting)
+            link = backward[0][meeting]
+            while link is not None:
+                state, action = link
+                actions.append(action)
+                link = backward[0][state]
+            return actions
+    return None
+
+
+def jumpPointSearch(problem):
+    """
+    Jump point search: A* over a pruned PositionSearchProblem, for 4-connected
+    grids of unit cost cells (problem.walls) with a single goal problem.goal.
+
+    Among the shortest paths between two cells there is always one that
+    only turns from a vertical move into a horizontal one where it has to,
+    because the cell diagonally behind the turn is a wall; any other turn can
+    be swapped with the vertical move before it.  Searching only such paths,
+    a vertical move continues straight until the goal, a wall or such a
+    forced turn, and a horizontal move continues until the goal, a wall or a
+    cell from which a vertical jump finds a jump point.  Only the cells
+    where jumps stop are expanded (and counted by getActions), with the
+    Manhattan distance to the goal as heuristic.  Returns None if the goal
+    cannot be reached.
+    """
+    from game import Directions
+    walls, goal = problem.walls, problem.goal
+    goalX, goalY = goal
+
+    def forcedTurn(x, y, dx, dy):
+        # Turning from moving dy vertically into dx horizontally at (x, y)
+        return not walls[x + dx][y] and walls[x + dx][y - dy]
+
+    def jumpVertical(x, y, dy):
+        while True:
+            y += dy
+            if walls[x][y]:
+                return None
+            if (x, y) == goal or forcedTurn(x, y, 1, dy) or forcedTurn(x, y, -1, dy):
+                return (x, y)
+
+    def jumpHorizontal(x, y, dx):
+        while True:
+            x += dx
+            if walls[x][y]:
+                return None
+            if (x, y) == goal or jumpVertical(x, y, 1) is not None or jumpVertical(x, y, -1) is not None:
+                return (x, y)
+
+    vectors = {Directions.NORTH: (0, 1), Directions.SOUTH: (0, -1),
+               Directions.EAST: (1, 0), Directions.WEST: (-1, 0)}
+    # Search nodes are (jump point, action that reached it), since the
+    # turns allowed from a jump point depend on how it was reached; parents
+    # map a node to (parent node, action, steps)
+    start = (problem.getStartState(), None)
+    parents = {start: None}
+    costs = {start: 0}
+    frontier = util.LazyPriorityQueue()
+    frontier.push(start, 0)
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        (x, y), arrival = node
+        if problem.goalTest((x, y)):
+            actions = []
+            link = parents[node]
+            while link is not None:
+                node, action, steps = link
+                actions[:0] = [action] * steps
+                link = parents[node]
+            return actions
+        for action in problem.getActions((x, y)):
+            dx, dy = vectors[action]
+            if arrival is not None:
+                arrivalX, arrivalY = vectors[arrival]
+                if (dx, dy) == (-arrivalX, -arrivalY):
+                    continue
+                # After a vertical move, only turn where forced
+                if arrivalY != 0 and dx != 0 and not forcedTurn(x, y, dx, arrivalY):
+                    continue
+            jumpPoint = jumpHorizontal(x, y, dx) if dx != 0 else jumpVertical(x, y, dy)
+            if jumpPoint is None:
+                continue
+            steps = abs(jumpPoint[0] - x) + abs(jumpPoint[1] - y)
+            cost = costs[node] + steps
+            child = (jumpPoint, action)
+            if cost >= costs.get(child, float('inf')):
+                continue
+            costs[child] = cost
+            parents[child] = (node, action, steps)
+            frontier.push(child, cost + abs(jumpPoint[0] - goalX) + abs(jumpPoint[1] - goalY))
+    return None
+
+def idaStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Iterative deepening A*: depth first searches bounded by f = g + h, each
+    bound the smallest f that exceeded the last.  Memory only grows with
+    the length of the path, which suits problems with few long cycles and a
+    good heuristic, such as the eight puzzle.  States are not repeated
+    along the current path.  Returns None if no goal can be reached.
+    """
+    bound = heuristic(problem.getStartState(), problem)
+    while True:
+        actions, bound = costLimitedSearch(problem, heuristic, bound)
+        if actions is not None:
+            return actions
+        if bound is None:
+            return None
+
+
+def costLimitedSearch(problem, heuristic, bound):
+    """
+    Returns a list of actions reaching a goal with f = g + h at most bound
+    all along, or None, and the smallest f over the bound met (None if
+    there was none).
+    """
+    start = problem.getStartState()
+    if problem.goalTest(start):
+        return [], bound
+    onPath = set([start])
+    path = []  # The actions to the state of the top frame of the stack
+    stack = [(start, 0, iter(problem.getActions(start)))]
+    nextBound = None
+    while stack:
+        state, cost, actions = stack[-1]
+        action = next(actions, None)
+        if action is None:
+            stack.pop()
+            onPath.discard(state)
+            if path:
+                path.pop()
+            continue
+        child = problem.getResult(state, action)
+        if child in onPath:
+            continue
+        childCost = cost + problem.getCost(state, action)
+        f = childCost + heuristic(child, problem)
+        if f > bound:
+            if nextBound is None or f < nextBound:
+                nextBound = f
+            continue
+        path.append(action)
+        if problem.goalTest(child):
+            return path, bound
+        onPath.add(child)
+        stack.append((child, childCost, iter(problem.getActions(child))))
+    return None, nextBound
 
 # Abbreviations
 bfs = breadthFirstSearch
 astar = aStarSearch
 ids = iterativeDeepeningSearch
+bds = bidirectionalSearch
+jps = jumpPointSearch
+idastar = idaStarSearch
@@ -37,13 +37,17 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import Grid
 import util
 import time
 import search
 import warnings
+import distanceCalculator
+from array import array
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
+    readOnlyStates = True
 
     def getAction(self, state):
         "The agent receives a GameState (defined in pacman.py)."
@@ -70,12 +74,15 @@ class SearchAgent(Agent):
       aStarSearch or astar
       iterativeDeepeningSearch or ids
       breadthFirstSearch or bfs
+      bidirectionalSearch or bds (PositionSearchProblem only)
+      jumpPointSearch or jps (PositionSearchProblem only)
 
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='aStarSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='aStarSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', index=0):
+        self.index = index
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -115,8 +122,13 @@ class SearchAgent(Agent):
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
         self.actions  = self.searchFunction(problem) # Find a path
-        totalCost = problem.getCostOfActions(self.actions)
-        print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
+        if self.actions is None:
+            # The search functions return None when no goal can be reached
+            print('No path found in %.1f seconds' % (time.time() - starttime))
+            self.actions = []
+        else:
+            totalCost = problem.getCostOfActions(self.actions)
+            print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
 
     def getAction(self, state):
@@ -262,11 +274,58 @@ def euclideanHeuristic(position, problem, info={}):
 # This portion is incomplete.  Time to write code!  #
 #####################################################
 
-class CornersProblem(search.SearchProblem):
+class MazeMaskProblem(search.SearchProblem):
+    """
+    The transitions shared by CornersProblem and FoodSearchProblem, whose
+    search states are tuples ( cellId, mask ) over the MazeDistances
+    self.distances (see distanceCalculator.py).  A move leads to the next
+    cell of distances.moves and changes the mask by updateMask.
+    """
+
+    def updateMask(self, mask, cellId):
+        "Returns mask after Pacman enters the cell cellId."
+        util.raiseNotDefined()
+
+    def getActions(self, state):
+        """
+        Given a state, returns available actions.
+        Returns a list of actions
+        """
+        self._expanded += 1 # DO NOT CHANGE
+        return self.distances.actions[state[0]]
+
+    def getResult(self, state, action):
+        """
+        Given a state and an action, returns resulting state.
+        """
+        # Expanded count is in getActions()
+        nextCell = self.distances.moves[state[0]].get(action)
+        if nextCell is None:
+            warnings.warn("Warning: checking the result of an invalid state, action pair.")
+            return state
+        return (nextCell, self.updateMask(state[1], nextCell))
+
+    def getCost(self, state, action):
+        """Given a state and an action, returns a cost of 1, which is
+        the incremental cost of expanding to that successor."""
+        if action in self.distances.moves[state[0]]:
+            return 1
+        return 0
+
+    def positionOf(self, state):
+        "Returns Pacman's (x,y) position in state."
+        return self.distances.cells[state[0]]
+
+
+class CornersProblem(MazeMaskProblem):
     """
     This search problem finds paths through all four corners of a layout.
 
-    You must select a suitable state space and successor function
+    A search state is a tuple ( cellId, visitedMask ) where cellId is the id
+    of Pacman's cell in the MazeDistances of the walls (see
+    distanceCalculator.py) and bit i of visitedMask is set once the corner
+    cornerCellIds[i] has been visited.  Corners that are walls cannot be
+    visited, so they are left out of the mask and of the goal.
     """
 
     def __init__(self, startingGameState):
@@ -281,62 +340,64 @@ class CornersProblem(search.SearchProblem):
             if not startingGameState.hasFood(*corner):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
-        # Please add any code here which you would like to use
-        # in initializing the problem
-        "*** YOUR CODE HERE ***"
+        self.distances = distanceCalculator.getMazeDistances(self.walls)
+        self.cornerCellIds = [self.distances.cellIds[corner] for corner in self.corners
+                              if corner in self.distances.cellIds]
+        # The bit of the corner in every cell, 0 for the other cells
+        self.cornerBits = [0] * self.distances.numCells
+        for i, cellId in enumerate(self.cornerCellIds):
+            self.cornerBits[cellId] = 1 << i
+        self.numMasks = 1 << len(self.cornerCellIds)
+        self.allVisited = self.numMasks - 1
+        startCell = self.distances.cellIds[self.startingPosition]
+        self.start = (startCell, self.cornerBits[startCell])
+        self.heuristicTable = self._computeHeuristicTable()
+
+    def _computeHeuristicTable(self):
+        """
+        Returns the length of the shortest walk from every cell through the
+        corners not yet visited, for every visited mask, indexed by
+        cellId * numMasks + visitedMask.
+
+        The walks are solved exactly over the corner to corner maze
+        distances: tours[i][mask] is the shortest walk that starts at
+        corner i and visits the corners of mask, which includes i.
+        """
+        numCorners = len(self.cornerCellIds)
+        numMasks = self.numMasks
+        cornerDistances = [[self.distances.cellDistance(a, b) for b in self.cornerCellIds]
+                           for a in self.cornerCellIds]
+        tours = [[0] * numMasks for corner in self.cornerCellIds]
+        for mask in sorted(range(1, numMasks), key=lambda m: bin(m).count('1')):
+            for i in range(numCorners):
+                if mask & (1 << i) and mask != 1 << i:
+                    rest = mask & ~(1 << i)
+                    tours[i][mask] = min([cornerDistances[i][j] + tours[j][rest]
+                                          for j in range(numCorners) if rest & (1 << j)])
+        table = array('I', [0]) * (self.distances.numCells * numMasks)
+        for cellId in range(self.distances.numCells):
+            toCorners = [self.distances.cellDistance(cellId, corner) for corner in self.cornerCellIds]
+            for visited in range(numMasks - 1):
+                remaining = self.allVisited & ~visited
+                table[cellId * numMasks + visited] = min([toCorners[i] + tours[i][remaining]
+                                                          for i in range(numCorners) if remaining & (1 << i)])
+        return table
 
     def getStartState(self):
         """
         Returns the start state (in your state space, not the full Pacman state
         space)
         """
-        "*** YOUR CODE HERE ***"
-        util.raiseNotDefined()
+        return self.start
 
     def goalTest(self, state):
         """
         Returns whether this search state is a goal state of the problem.
         """
-        "*** YOUR CODE HERE ***"
-        util.raiseNotDefined()
-
-    def getActions(self, state):
-        """
-        Given a state, returns available actions.
-        Returns a list of actions
-        """
-        actions = []
-        self._expanded += 1  # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                actions.append(direction)
-        return actions
-
-    def getResult(self, state, action):
-        """
-        Given a state and an action, returns resulting state 
-        """
-        # Expanded count is in getActions()
-        
-        # Add a successor state to the successor list if the action is legal
-        # Here's a code snippet for figuring out whether a new position hits a wall:
-        #   x,y = currentPosition
-        #   dx, dy = Actions.directionToVector(action)
-        #   nextx, nexty = int(x + dx), int(y + dy)
-        #   hitsWall = self.walls[nextx][nexty]
+        return state[1] == self.allVisited
 
-        "*** YOUR CODE HERE ***"
-
-    def getCost(self, state, action):
-        """Given a state and an action, returns a cost of 1, which is
-        the incremental cost of expanding to that successor."""
-        nextState = self.getResult(state, action)
-        if nextState != state:
-            return 1
-        return 0
+    def updateMask(self, visitedMask, cellId):
+        return visitedMask | self.cornerBits[cellId]
 
     def getCostOfActions(self, actions):
         """
@@ -364,88 +425,65 @@ def cornersHeuristic(state, problem):
     This function should always return a number that is a lower bound on the
     shortest path from the state to a goal of the problem; i.e.  it should be
     admissible (as well as consistent).
-    """
-    corners = problem.corners # These are the corner coordinates
-    walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
 
-    "*** YOUR CODE HERE ***"
-    return 0 # Default to trivial solution
+    Returns the length of the shortest walk through the remaining corners
+    under maze distances, looked up in the table CornersProblem precomputes.
+    That is the exact cost to the goal, so it is admissible and consistent.
+    """
+    cellId, visitedMask = state
+    return problem.heuristicTable[cellId * problem.numMasks + visitedMask]
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
-    def __init__(self):
+    def __init__(self, index=0):
+        self.index = index
         self.searchFunction = lambda prob: search.aStarSearch(prob, cornersHeuristic)
         self.searchType = CornersProblem
 
-class FoodSearchProblem:
+class FoodSearchProblem(MazeMaskProblem):
     """
     A search problem associated with finding the a path that collects all of the
     food (dots) in a Pacman game.
 
-    A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
-      pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+    A search state in this problem is a tuple ( cellId, foodMask ) where
+      cellId:   the id of Pacman's cell in the MazeDistances of the walls
+                (see distanceCalculator.py)
+      foodMask: an int whose bit i is set while the food at foodPositions[i]
+                remains
+
+    Successors and hashes are then O(1).  positionOf, foodList, toGrid and
+    decodeState convert a state back to positions and to the public
+    ( pacmanPosition, foodGrid ) form, with foodGrid a Grid (see game.py).
     """
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
+        self.distances = distanceCalculator.getMazeDistances(self.walls)
+        self.foodPositions = startingGameState.getFood().asList()
+        self.foodCellIds = [self.distances.cellIds[position] for position in self.foodPositions]
+        # The bit of the food in every cell, 0 for cells without food
+        self.foodBits = [0] * self.distances.numCells
+        for i, cellId in enumerate(self.foodCellIds):
+            self.foodBits[cellId] = 1 << i
+        self.startPosition = startingGameState.getPacmanPosition()
+        startCell = self.distances.cellIds[self.startPosition]
+        self.start = (startCell, ((1 << len(self.foodPositions)) - 1) & ~self.foodBits[startCell])
 
     def getStartState(self):
         return self.start
 
     def goalTest(self, state):
-        return state[1].count() == 0
-
-    def getActions(self, state):
-        """
-        Given a state, returns available actions.
-        Returns a list of actions
-        """
-        actions = []
-        self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                actions.append( direction )
-        return actions
+        return state[1] == 0
 
-    def getResult(self, state, action):
-        """
-        Given a state and an action, returns resulting state and a cost of 1, which is
-        the incremental cost of expanding to that successor.
-        Returns (next_state, cost)
-        """
-        # Expanded count is in getActions()
-        x,y = state[0]
-        dx, dy = Actions.directionToVector(action)
-        nextx, nexty = int(x + dx), int(y + dy)
-        if (not self.walls[nextx][nexty]) and (not self.walls[nextx][nexty]):
-            nextFood = state[1].copy()
-            nextFood[nextx][nexty] = False
-            return ((nextx, nexty), nextFood)
-        else:
-            warnings.warn("Warning: checking the result of an invalid state, action pair.")
-            return state
-            
-    def getCost(self, state, action):
-        """
-        Given a state and an action, returns a cost of 1, which is the incremental cost of 
-        expanding to that successor.
-        """
-        nextState = self.getResult(state, action)
-        if nextState != state:
-            return 1
-        return 0
+    def updateMask(self, foodMask, cellId):
+        return foodMask & ~self.foodBits[cellId]
 
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
         include an illegal move, return 999999"""
-        x,y= self.getStartState()[0]
+        x,y= self.startPosition
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -456,12 +494,32 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+    def foodList(self, state):
+        "Returns the positions of the food remaining in state."
+        foodMask = state[1]
+        return [position for i, position in enumerate(self.foodPositions) if foodMask >> i & 1]
+
+    def toGrid(self, state):
+        "Returns a Grid of the food remaining in state."
+        foodGrid = Grid(self.walls.width, self.walls.height, False)
+        for x, y in self.foodList(state):
+            foodGrid[x][y] = True
+        return foodGrid
+
+    def decodeState(self, state):
+        "Returns state as a ( pacmanPosition, foodGrid ) tuple."
+        return (self.positionOf(state), self.toGrid(state))
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
-    def __init__(self):
+    def __init__(self, index=0):
+        self.index = index
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
+# The most food masks foodHeuristic memoizes per problem
+FOOD_TREE_CACHE_SIZE = 100000
+
 def foodHeuristic(state, problem):
     """
     Your heuristic for the FoodSearchProblem goes here.
@@ -475,9 +533,10 @@ def foodHeuristic(state, problem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a tuple ( cellId, foodMask ) (see FoodSearchProblem).  You
+    can call problem.decodeState(state) to get the ( pacmanPosition, foodGrid )
+    tuple, where foodGrid is a Grid (see game.py) of either True or False, or
+    problem.foodList(state) to get a list of food coordinates instead.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -489,10 +548,53 @@ def foodHeuristic(state, problem):
     value, try: problem.heuristicInfo['wallCount'] = problem.walls.count()
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
+
+    Returns the maze distance to the nearest remaining food plus the length
+    of a minimum spanning tree of the remaining food under maze distances.
+    Any path eating all the food walks to some food first and then connects
+    the rest, which costs at least a spanning tree, so this is admissible;
+    a step changes the nearest food distance by at most one and eating a
+    food shrinks the tree by at most the edge to it, so it is consistent.
+    The tree and the remaining food only depend on the food mask and are
+    memoized per mask in problem.heuristicInfo['foodTrees'], which keeps at
+    most FOOD_TREE_CACHE_SIZE masks.
+    """
+    cellId, foodMask = state
+    if foodMask == 0:
+        return 0
+    trees = problem.heuristicInfo.setdefault('foodTrees', {})
+    tree = trees.get(foodMask)
+    if tree is None:
+        foodCells = [cell for i, cell in enumerate(problem.foodCellIds) if foodMask >> i & 1]
+        tree = (foodTreeLength(problem.distances, foodCells), foodCells)
+        if len(trees) >= FOOD_TREE_CACHE_SIZE:
+            # Evict the oldest mask
+            del trees[next(iter(trees))]
+        trees[foodMask] = tree
+    treeLength, foodCells = tree
+    table = problem.distances.table
+    row = cellId * problem.distances.numCells
+    return treeLength + min([table[row + cell] for cell in foodCells])
+
+def foodTreeLength(distances, cellIds):
+    """
+    Returns the length of a minimum spanning tree of the cells cellIds under
+    maze distances (Prim's algorithm on the complete graph).
     """
-    position, foodGrid = state
-    "*** YOUR CODE HERE ***"
-    return 0
+    table, numCells = distances.table, distances.numCells
+    row = cellIds[0] * numCells
+    # The distance from the tree to every cell not yet in it
+    closest = dict([(cell, table[row + cell]) for cell in cellIds[1:]])
+    length = 0
+    while closest:
+        cell = min(closest, key=closest.get)
+        length += closest.pop(cell)
+        row = cell * numCells
+        for other in closest:
+            distance = table[row + other]
+            if distance < closest[other]:
+                closest[other] = distance
+    return length
 
 def mazeDistance(point1, point2, gameState):
     """
@@ -503,11 +605,14 @@ def mazeDistance(point1, point2, gameState):
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    Distances come from the all-pairs table of distanceCalculator, which is
+    built once per layout and found by the identity of the layout's walls,
+    so repeated queries are O(1).
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return distanceCalculator.getMazeDistances(walls).distance(point1, point2)
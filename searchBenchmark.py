@@ -0,0 +1,364 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Compares the search algorithms of search.py on the search problems of
+searchAgents.py.
+
+Every (algorithm, heuristic, problem, layout) combination is solved once,
+without graphics, and reported with its node expansions (the problems'
+_expanded counters), path cost, wall time and peak memory (measured by
+tracemalloc in a second, untimed run).  Path and maze problems are solved
+on layouts/*Maze.lay, corner problems on *Corners.lay and food problems on
+*Search.lay:
+
+> python searchBenchmark.py
+> python searchBenchmark.py --algorithms astar --problems Food --layouts 'tiny*,small*' --json report.json
+
+Combinations whose algorithm or heuristic is not implemented, that run
+out of time or that raise are reported as such instead of stopping the
+sweep.
+
+With --bfsScaling, breadth-first search is instead timed on mazes, open
+rooms of growing size and food problem state spaces, to check that its
+time stays linear in the number of states.  With --eightPuzzle N, the eight puzzles of
+eightpuzzle.EIGHT_PUZZLE_DATA are solved by every eight puzzle solver and N
+random puzzles by eightpuzzle.solveEightPuzzle.
+"""
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import fnmatch
+import tracemalloc
+import util
+import search
+import layout
+import searchAgents
+import eightpuzzle
+from pacman import GameState
+
+# Problem name: (problem class, layout file pattern, heuristics for A*)
+PROBLEMS = {
+    'Position': (lambda state: searchAgents.PositionSearchProblem(state, warn=False, visualize=False),
+                 '*Maze.lay', ['nullHeuristic', 'manhattanHeuristic', 'euclideanHeuristic']),
+    'Corners': (searchAgents.CornersProblem, '*Corners.lay', ['nullHeuristic', 'cornersHeuristic']),
+    'Food': (searchAgents.FoodSearchProblem, '*Search.lay', ['nullHeuristic', 'foodHeuristic']),
+}
+ALGORITHMS = ['bfs', 'astar', 'ids', 'bds', 'jps']
+# Algorithms that need a single goal state on a grid, as PositionSearchProblem has
+POSITION_ALGORITHMS = ['bds', 'jps']
+SCALING_LAYOUTS = ['mediumMaze', 'openMaze', 'bigMaze']
+# Food problems, whose state spaces are large enough for the frontier to grow
+# to thousands of states
+SCALING_FOOD_LAYOUTS = ['tinySearch', 'trickySearch', 'smallSearch']
+REPORT_FIELDS = ['algorithm', 'heuristic', 'problem', 'layout', 'status', 'expanded', 'cost', 'time', 'peakMemory']
+
+
+def getHeuristic(name):
+    if hasattr(searchAgents, name):
+        return getattr(searchAgents, name)
+    return getattr(search, name)
+
+
+def getLayoutNames(pattern, layoutFilter):
+    names = [os.path.basename(path)[:-len('.lay')] for path in glob.glob(os.path.join('layouts', pattern))]
+    if layoutFilter is not None:
+        names = [name for name in names if any([fnmatch.fnmatch(name, f) for f in layoutFilter])]
+    return sorted(names)
+
+
+def getMatrix(algorithms, problems, layoutFilter=None):
+    """
+    Returns the (algorithm, heuristic, problem, layout) combinations to run.
+    Only A* is combined with heuristics, and POSITION_ALGORITHMS only with
+    the Position problem.
+    """
+    cells = []
+    for problemName in problems:
+        makeProblem, pattern, heuristics = PROBLEMS[problemName]
+        for layoutName in getLayoutNames(pattern, layoutFilter):
+            for algorithm in algorithms:
+                if algorithm in POSITION_ALGORITHMS and problemName != 'Position':
+                    continue
+                for heuristic in (heuristics if algorithm == 'astar' else [None]):
+                    cells.append((algorithm, heuristic, problemName, layoutName))
+    return cells
+
+
+def makeProblem(problemName, lay):
+    state = GameState()
+    state.initialize(lay, lay.getNumGhosts())
+    return PROBLEMS[problemName][0](state)
+
+
+def solve(algorithm, heuristic, problemName, lay, timeout):
+    """
+    Builds the problem on the Layout lay and solves it once.  Returns the
+    problem, the actions found and the seconds it took.
+    """
+    problem = makeProblem(problemName, lay)
+    function = getattr(search, algorithm)
+    if heuristic is not None:
+        solver = util.TimeoutFunction(lambda: function(problem, heuristic=getHeuristic(heuristic)), timeout)
+    else:
+        solver = util.TimeoutFunction(lambda: function(problem), timeout)
+    start = time.perf_counter()
+    actions = solver()
+    return problem, actions, time.perf_counter() - start
+
+
+def runCell(algorithm, heuristic, problemName, layoutName, timeout, measureMemory=True):
+    """
+    Runs one combination and returns its report row.
+    """
+    row = {'algorithm': algorithm, 'heuristic': heuristic or '-', 'problem': problemName, 'layout': layoutName,
+           'status': 'ok', 'expanded': None, 'cost': None, 'time': None, 'peakMemory': None}
+    # Silences the problems' warnings and raiseNotDefined
+    util.mutePrint()
+    try:
+        lay = layout.getLayout(layoutName)
+        problem, actions, elapsed = solve(algorithm, heuristic, problemName, lay, timeout)
+        row['expanded'] = problem._expanded
+        row['time'] = elapsed
+        if actions is None:
+            row['status'] = 'no solution'
+        else:
+            row['cost'] = problem.getCostOfActions(actions)
+        if measureMemory:
+            tracemalloc.start()
+            try:
+                solve(algorithm, heuristic, problemName, lay, timeout)
+                row['peakMemory'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except util.TimeoutFunctionException:
+        row['status'] = 'timeout'
+    except SystemExit:
+        row['status'] = 'not implemented'
+    except Exception as e:
+        row['status'] = 'error: %s: %s' % (type(e).__name__, e)
+    finally:
+        util.unmutePrint()
+    return row
+
+
+class ListQueue:
+    """
+    The list-backed FIFO queue util.Queue used to be, whose push shifts the
+    whole list, for comparison.
+    """
+
+    def __init__(self):
+        self.list = []
+
+    def push(self, item):
+        self.list.insert(0, item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def isEmpty(self):
+        return len(self.list) == 0
+
+
+def openLayout(size):
+    """
+    A size x size room with Pacman and the food in opposite corners.
+    """
+    row = '%' + ' ' * (size - 2) + '%'
+    rows = ['%' * size, row[:-2] + 'P%'] + [row] * (size - 4) + ['%.' + row[2:], '%' * size]
+    return layout.Layout(rows)
+
+
+def bfsTraversal(problem, queue):
+    """
+    Visits every state reachable from the start of problem breadth first,
+    using queue as the frontier, and returns the number of states visited.
+    """
+    start = problem.getStartState()
+    visited = set([start])
+    queue.push(start)
+    while not queue.isEmpty():
+        state = queue.pop()
+        for action in problem.getActions(state):
+            nextState = problem.getResult(state, action)
+            if nextState not in visited:
+                visited.add(nextState)
+                queue.push(nextState)
+    return len(visited)
+
+
+def runBfsScaling(timeout, sizes=(25, 50, 100, 200, 400)):
+    """
+    Times breadth-first traversals of the maze layouts and of open rooms of
+    growing size, as position problems, and of the state spaces of food
+    problems, with util.Queue and with the old list-backed queue, and
+    search.bfs on the same problems if it is implemented.  Position problems
+    keep frontiers of a few hundred states, food problems of thousands,
+    where a queue whose push is linear in its length shows.  Prints the
+    time per state and, for each problem and method, the exponent k of
+    time ~ states^k between the smallest and largest problem: k close to 1
+    is linear.
+    """
+    import math
+    layouts = [('Position', name, layout.getLayout(name)) for name in SCALING_LAYOUTS]
+    layouts += [('Position', 'open%dx%d' % (size, size), openLayout(size)) for size in sizes]
+    layouts += [('Food', name, layout.getLayout(name)) for name in SCALING_FOOD_LAYOUTS]
+    methods = [('util.Queue', lambda problem: bfsTraversal(problem, util.Queue())),
+               ('list.insert', lambda problem: bfsTraversal(problem, ListQueue())),
+               ('search.bfs', lambda problem: search.breadthFirstSearch(problem) and problem._expanded)]
+    print('%-9s %-16s %-12s %9s %10s %10s' % ('problem', 'layout', 'method', 'states', 'time', 'us/state'))
+    points = {}
+    for problemName, layoutName, lay in layouts:
+        for methodName, method in methods:
+            problem = makeProblem(problemName, lay)
+            util.mutePrint()
+            try:
+                start = time.perf_counter()
+                util.TimeoutFunction(method, timeout)(problem)
+                elapsed = time.perf_counter() - start
+            except util.TimeoutFunctionException:
+                elapsed = None
+                status = 'timeout'
+            except SystemExit:
+                elapsed = None
+                status = 'not implemented'
+            finally:
+                util.unmutePrint()
+            if elapsed is None:
+                print('%-9s %-16s %-12s %9s %10s %10s  %s' % (problemName, layoutName, methodName, '-', '-', '-', status))
+                continue
+            states = problem._expanded
+            points.setdefault((problemName, methodName), []).append((states, elapsed))
+            print('%-9s %-16s %-12s %9d %9.3fs %10.2f' % (problemName, layoutName, methodName, states, elapsed,
+                                                           elapsed / states * 1e6))
+            sys.stdout.flush()
+    for (problemName, methodName), methodPoints in sorted(points.items()):
+        if len(methodPoints) > 1:
+            (n1, t1), (n2, t2) = min(methodPoints), max(methodPoints)
+            print('%-9s %-12s time ~ states^%.2f over %d to %d states' % (
+                problemName, methodName, math.log(t2 / t1) / math.log(n2 / n1), n1, n2))
+
+
+def runEightPuzzles(count, timeout):
+    """
+    Solves every puzzle of EIGHT_PUZZLE_DATA with iterative deepening,
+    A* and IDA* on EightPuzzleSearchProblem (the informed ones with the
+    pattern database heuristic) and with solveEightPuzzle, printing the
+    moves, expansions and time of each, then times solveEightPuzzle on
+    count random puzzles.
+    """
+    solvers = [('ids', lambda problem: search.ids(problem)),
+               ('astar', lambda problem: search.astar(problem, eightpuzzle.eightPuzzleHeuristic)),
+               ('idastar', lambda problem: search.idastar(problem, eightpuzzle.eightPuzzleHeuristic)),
+               ('solveEightPuzzle', lambda problem: eightpuzzle.solveEightPuzzle(problem.puzzle))]
+    # Built (or read from the cache) outside of the timings
+    eightpuzzle.getPatternDatabases()
+    print('%-7s %-18s %6s %9s %10s  %s' % ('puzzle', 'solver', 'moves', 'expanded', 'time', 'status'))
+    for puzzleNumber in range(len(eightpuzzle.EIGHT_PUZZLE_DATA)):
+        for solverName, solver in solvers:
+            problem = eightpuzzle.EightPuzzleSearchProblem(eightpuzzle.loadEightPuzzle(puzzleNumber))
+            try:
+                start = time.perf_counter()
+                actions = util.TimeoutFunction(solver, timeout)(problem)
+                elapsed = time.perf_counter() - start
+            except util.TimeoutFunctionException:
+                print('%-7d %-18s %6s %9s %10s  timeout' % (puzzleNumber, solverName, '-', '-', '-'))
+                continue
+            expanded = '-' if solverName == 'solveEightPuzzle' else '%d' % problem._expanded
+            print('%-7d %-18s %6d %9s %9.4fs  ok' % (puzzleNumber, solverName, len(actions), expanded, elapsed))
+            sys.stdout.flush()
+    if count > 0:
+        puzzles = [eightpuzzle.createRandomEightPuzzle() for i in range(count)]
+        start = time.perf_counter()
+        moves = [len(eightpuzzle.solveEightPuzzle(puzzle)) for puzzle in puzzles]
+        elapsed = time.perf_counter() - start
+        print('solveEightPuzzle: %d random puzzles in %.3fs (%.0f puzzles/s), %.1f moves on average' % (
+            count, elapsed, count / elapsed, float(sum(moves)) / count))
+
+
+def formatRow(row):
+    def show(value, format):
+        return '-' if value is None else format % value
+    return '%-6s %-20s %-9s %-18s %8s %7s %10s %12s  %s' % (
+        row['algorithm'], row['heuristic'], row['problem'], row['layout'], show(row['expanded'], '%d'),
+        show(row['cost'], '%d'), show(row['time'], '%.3fs'), show(row['peakMemory'], '%d'), row['status'])
+
+
+def writeReport(rows, fileName):
+    """
+    Writes the rows as JSON, or as CSV if fileName ends in .csv.
+    """
+    with open(fileName, 'w', newline='') as f:
+        if fileName.endswith('.csv'):
+            writer = csv.DictWriter(f, REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, f, indent=2)
+            f.write('\n')
+
+
+def readCommand(argv):
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Benchmarks the search algorithms on the search problems and layouts.')
+    parser.add_argument('--algorithms', dest='algorithms', default=','.join(ALGORITHMS),
+                        help='Comma separated search functions of search.py (default %(default)s)')
+    parser.add_argument('--problems', dest='problems', default=','.join(PROBLEMS),
+                        help='Comma separated problems among %s (default all)' % ', '.join(PROBLEMS))
+    parser.add_argument('--layouts', dest='layouts', default=None,
+                        help='Comma separated layout name patterns, e.g. "tiny*,small*" (default all)')
+    parser.add_argument('--timeout', dest='timeout', type=int, default=30,
+                        help='Seconds allowed per combination (default %(default)s)')
+    parser.add_argument('--noMemory', dest='measureMemory', action='store_false', default=True,
+                        help='Skips the tracemalloc run that measures peak memory')
+    parser.add_argument('--bfsScaling', dest='bfsScaling', action='store_true', default=False,
+                        help='Measures how breadth-first search time grows with the number of states instead')
+    parser.add_argument('--eightPuzzle', dest='eightPuzzle', type=int, default=None, metavar='N',
+                        help='Benchmarks the eight puzzle solvers instead, with N random puzzles')
+    parser.add_argument('--json', dest='jsonFile', default=None, metavar='FILE', help='Writes the report as JSON to FILE')
+    parser.add_argument('--csv', dest='csvFile', default=None, metavar='FILE', help='Writes the report as CSV to FILE')
+    options = parser.parse_args(argv)
+    for problemName in options.problems.split(','):
+        if problemName not in PROBLEMS:
+            raise Exception('Unknown problem %s; choose from %s' % (problemName, ', '.join(PROBLEMS)))
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    if options.bfsScaling:
+        runBfsScaling(options.timeout)
+        sys.exit(0)
+    if options.eightPuzzle is not None:
+        runEightPuzzles(options.eightPuzzle, options.timeout)
+        sys.exit(0)
+    layoutFilter = options.layouts.split(',') if options.layouts else None
+    cells = getMatrix(options.algorithms.split(','), options.problems.split(','), layoutFilter)
+    print('%-6s %-20s %-9s %-18s %8s %7s %10s %12s  %s' % ('algo', 'heuristic', 'problem', 'layout', 'expanded',
+                                                          'cost', 'time', 'peak bytes', 'status'))
+    rows = []
+    for cell in cells:
+        row = runCell(*(cell + (options.timeout, options.measureMemory)))
+        rows.append(row)
+        print(formatRow(row))
+        sys.stdout.flush()
+    if options.jsonFile is not None:
+        writeReport(rows, options.jsonFile)
+    if options.csvFile is not None:
+        writeReport(rows, options.csvFile)
@@ -0,0 +1,120 @@
+# tableCache.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+An on-disk cache for precomputed tables such as the maze distances of a
+layout.
+
+A table is a flat array of one numeric type (an array.array typecode).  It
+is stored in a file named after a hash of the text it was computed from, so
+editing a .lay file simply leads to a different file and the stale one is
+never read again.  Cached tables are memory-mapped read-only and returned
+as a memoryview, so later runs and worker processes share the pages
+instead of recomputing or copying them.
+
+The cache lives in .tablecache next to this file; set PACMAN_TABLE_CACHE to
+another directory, or to 'off' to disable it.
+"""
+
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import tempfile
+from array import array
+
+MAGIC = b'PACTBL01'
+HEADER = struct.Struct('<8scxxxQ')  # magic, typecode, number of items
+
+
+def getCacheDir():
+    cacheDir = os.environ.get('PACMAN_TABLE_CACHE')
+    if cacheDir is None:
+        cacheDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tablecache')
+    if cacheDir == 'off':
+        return None
+    return cacheDir
+
+
+def getCachePath(kind, contentText, typecode):
+    """
+    Returns the file holding the kind table computed from contentText.
+    """
+    cacheDir = getCacheDir()
+    if cacheDir is None:
+        return None
+    digest = hashlib.sha1('\n'.join([kind, typecode, sys.byteorder, contentText]).encode()).hexdigest()
+    return os.path.join(cacheDir, '%s-%s.bin' % (kind, digest))
+
+
+def loadTable(kind, contentText, typecode, compute):
+    """
+    Returns the kind table for contentText.
+
+    If the table is cached, it is mapped from disk and returned as a
+    read-only memoryview of items of the given typecode.  Otherwise
+    compute() is called; it must return an array.array of that typecode,
+    which is written to the cache and returned as is.
+    """
+    path = getCachePath(kind, contentText, typecode)
+    if path is not None:
+        table = _mapTable(path, typecode)
+        if table is not None:
+            return table
+    table = compute()
+    if path is not None:
+        _writeTable(path, table)
+    return table
+
+
+def _mapTable(path, typecode):
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) < HEADER.size:
+        mapped.close()
+        return None
+    magic, storedTypecode, count = HEADER.unpack_from(mapped)
+    view = memoryview(mapped)[HEADER.size:]
+    if magic != MAGIC or storedTypecode != typecode.encode() or view.nbytes != count * array(typecode).itemsize:
+        # Truncated or foreign file: recompute and overwrite it
+        view.release()
+        mapped.close()
+        return None
+    return view.cast(typecode)
+
+
+def _writeTable(path, table):
+    """
+    Writes the table through a temporary file so that readers never see a
+    partially written table.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, table.typecode.encode(), len(table)))
+                f.write(table.tobytes())
+            os.chmod(tmpPath, 0o644)
+            os.replace(tmpPath, path)
+        except BaseException:
+            os.unlink(tmpPath)
+            raise
+    except OSError:
+        # A read-only or full disk only costs the recomputation next time
+        pass
@@ -15,6 +15,7 @@
 import sys
 import inspect
 import heapq
+import collections
 import random
 import io
 
@@ -167,23 +168,31 @@ class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
 
     def __init__(self):
-        self.list = []
+        # Items are enqueued on the right and dequeued on the left, both O(1)
+        self.list = collections.deque()
 
     def push(self, item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0, item)
+        self.list.append(item)
+
+    def extend(self, items):
+        "Enqueue every item of 'items', in order"
+        self.list.extend(items)
 
     def pop(self):
         """
         Dequeue the earliest enqueued item still in the queue. This
         operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 
 class PriorityQueue:
     """
@@ -225,6 +234,186 @@ class PriorityQueue:
             self.push(item, priority)
 
 
+class IndexedPriorityQueue:
+    """
+    A priority queue that holds each item at most once, with O(log n)
+    update and decreaseKey.  A binary heap is kept together with a map from
+    each item to its slot in the heap, so items must be hashable.  Items of
+    equal priority are popped in the order they were first pushed.
+
+    >>> q = IndexedPriorityQueue()
+    >>> q.push('a', 5); q.push('b', 3); q.push('c', 4)
+    >>> q.update('a', 1)
+    >>> 'b' in q, len(q)
+    (True, 3)
+    >>> [q.pop() for _ in range(len(q))]
+    ['a', 'b', 'c']
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.positions = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item, or changes its priority if it is already in the queue"
+        if item in self.positions:
+            self._setPriority(self.positions[item], priority)
+            return
+        self.heap.append([priority, self.count, item])
+        self.count += 1
+        self.positions[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority"
+        heap = self.heap
+        last = heap.pop()
+        if not heap:
+            del self.positions[last[2]]
+            return last[2]
+        priority, count, item = heap[0]
+        heap[0] = last
+        self.positions[last[2]] = 0
+        del self.positions[item]
+        self._siftDown(0)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        # Like PriorityQueue.update: lowers the priority of an item already
+        # in the queue, ignores a higher one, and pushes a new item.
+        if item in self.positions:
+            index = self.positions[item]
+            if priority < self.heap[index][0]:
+                self._setPriority(index, priority)
+        else:
+            self.push(item, priority)
+
+    def decreaseKey(self, item, priority):
+        "Lowers the priority of an item that is in the queue"
+        index = self.positions[item]
+        if priority > self.heap[index][0]:
+            raise Exception('decreaseKey cannot raise the priority of %s' % str(item))
+        self._setPriority(index, priority)
+
+    def getPriority(self, item):
+        return self.heap[self.positions[item]][0]
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _setPriority(self, index, priority):
+        entry = self.heap[index]
+        oldPriority = entry[0]
+        entry[0] = priority
+        if priority < oldPriority:
+            self._siftUp(index)
+        else:
+            self._siftDown(index)
+
+    def _siftUp(self, index):
+        heap, positions = self.heap, self.positions
+        entry = heap[index]
+        key = (entry[0], entry[1])
+        while index > 0:
+            parentIndex = (index - 1) >> 1
+            parent = heap[parentIndex]
+            if (parent[0], parent[1]) <= key:
+                break
+            heap[index] = parent
+            positions[parent[2]] = index
+            index = parentIndex
+        heap[index] = entry
+        positions[entry[2]] = index
+
+    def _siftDown(self, index):
+        heap, positions = self.heap, self.positions
+        size = len(heap)
+        entry = heap[index]
+        key = (entry[0], entry[1])
+        while True:
+            childIndex = 2 * index + 1
+            if childIndex >= size:
+                break
+            child = heap[childIndex]
+            if childIndex + 1 < size:
+                right = heap[childIndex + 1]
+                if (right[0], right[1]) < (child[0], child[1]):
+                    childIndex += 1
+                    child = right
+            if key <= (child[0], child[1]):
+                break
+            heap[index] = child
+            positions[child[2]] = index
+            index = childIndex
+        heap[index] = entry
+        positions[entry[2]] = index
+
+
+class LazyPriorityQueue:
+    """
+    A priority queue that handles updates by pushing duplicate entries and
+    skipping the outdated ones when they reach the top.  update is a plain
+    O(log n) heappush, at the price of a heap that grows with every update,
+    which is usually the faster choice for A*.  Items must be hashable; an
+    item is popped at most once per push or update that lowered it.
+
+    >>> q = LazyPriorityQueue()
+    >>> q.push('a', 5); q.push('b', 3)
+    >>> q.update('a', 1); q.update('b', 4)
+    >>> 'a' in q, len(q)
+    (True, 2)
+    >>> q.pop(), q.pop(), q.isEmpty()
+    ('a', 'b', True)
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item, or replaces its priority if it is already in the queue"
+        entry = (priority, self.count, item)
+        self.count += 1
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def pop(self):
+        "Removes and returns the item with the lowest priority"
+        heap, entries = self.heap, self.entries
+        while True:
+            entry = heapq.heappop(heap)
+            item = entry[2]
+            if entries.get(item) is entry:
+                del entries[item]
+                return item
+
+    def isEmpty(self):
+        return len(self.entries) == 0
+
+    def update(self, item, priority):
+        # Same semantics as PriorityQueue.update
+        entry = self.entries.get(item)
+        if entry is None or priority < entry[0]:
+            self.push(item, priority)
+
+    def getPriority(self, item):
+        return self.entries[item][0]
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the